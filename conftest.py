@@ -0,0 +1,21 @@
+import shutil
+import tempfile
+
+import pytest
+from django.test.utils import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_settings():
+    """Свой файл кеша на запуск и чтения только из default.
+
+    Транзакционные тесты pytest-django разрешают запросы лишь
+    к default, а псевдонимы реплик — отдельные соединения.
+    """
+    from core.runner import isolated_caches
+
+    directory = tempfile.mkdtemp(prefix='yatube-test-cache-')
+    with override_settings(CACHES=isolated_caches(directory),
+                           READ_DATABASES=[]):
+        yield
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,70 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Post
+
+from .serializers import COMMENT_FIELDS, POST_FIELDS, Serializer
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_COLUMNS = ('type', 'id', 'post', 'author', 'group', 'text', 'date')
+
+encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def author_records(author, chunk_size):
+    return _records(Post.objects.filter(author=author),
+                    Comment.objects.filter(author=author), chunk_size)
+
+
+def group_records(group, chunk_size):
+    return _records(Post.objects.filter(group=group),
+                    Comment.objects.filter(post__group=group), chunk_size)
+
+
+def _records(posts, comments, chunk_size):
+    """Посты, затем комментарии в хронологическом порядке.
+
+    iterator() не кеширует объекты в QuerySet, поэтому память
+    не растёт с размером выгрузки.
+    """
+    for kind, queryset, serializer, ordering in (
+        ('post', posts, Serializer(POST_FIELDS, 'id,author,group,text,'
+                                                'pub_date'),
+         ('pub_date', 'id')),
+        ('comment', comments, Serializer(COMMENT_FIELDS), ('created', 'id')),
+    ):
+        queryset = serializer.prepare(queryset, ordering).order_by(*ordering)
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield kind, serializer.to_dict(obj)
+
+
+def render_ndjson(records):
+    for kind, data in records:
+        yield encoder.encode({'type': kind, **data}) + '\n'
+
+
+def render_csv(records):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for kind, data in records:
+        date = data.get('pub_date') or data.get('created')
+        yield writer.writerow((kind, data['id'], data.get('post', ''),
+                               data['author'], data.get('group') or '',
+                               data['text'], date))
+
+
+def render(records, export_format):
+    if export_format == 'csv':
+        return render_csv(records)
+    return render_ndjson(records)
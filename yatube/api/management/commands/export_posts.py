@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import export
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты и комментарии автора или группы '
+            'в NDJSON или CSV. Память не зависит от объёма выгрузки.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--user', help='Имя пользователя')
+        source.add_argument('--group', help='Slug группы')
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='ndjson')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['user']:
+            author = User.objects.filter(username=options['user']).first()
+            if author is None:
+                raise CommandError('Пользователь не найден')
+            records = export.author_records(author, chunk_size)
+        else:
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError('Группа не найдена')
+            records = export.group_records(group, chunk_size)
+        chunks = export.render(records, options['format'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='',
+                  encoding='utf-8') as output:
+            output.writelines(chunks)
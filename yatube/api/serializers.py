@@ -0,0 +1,72 @@
+from collections import namedtuple
+from operator import attrgetter
+
+Field = namedtuple('Field', ('getter', 'only', 'related'))
+
+
+def _isoformat(name):
+    return lambda obj: getattr(obj, name).isoformat()
+
+
+POST_FIELDS = {
+    'id': Field(attrgetter('pk'), ('id',), None),
+    'text': Field(attrgetter('text'), ('text',), None),
+    'pub_date': Field(_isoformat('pub_date'), ('pub_date',), None),
+    'author': Field(attrgetter('author.username'),
+                    ('author', 'author__username'), 'author'),
+    'group': Field(lambda post: post.group.slug if post.group_id else None,
+                   ('group', 'group__slug'), 'group'),
+    'image': Field(lambda post: post.image.url if post.image else None,
+                   ('image',), None),
+    'comments_count': Field(attrgetter('comments_count'),
+                            ('comments_count',), None),
+}
+
+COMMENT_FIELDS = {
+    'id': Field(attrgetter('pk'), ('id',), None),
+    'post': Field(attrgetter('post_id'), ('post',), None),
+    'author': Field(attrgetter('author.username'),
+                    ('author', 'author__username'), 'author'),
+    'text': Field(attrgetter('text'), ('text',), None),
+    'created': Field(_isoformat('created'), ('created',), None),
+}
+
+
+class Serializer:
+    """Сериализатор с выборочным набором полей (?fields=).
+
+    По запрошенным полям строит select_related() и only(), чтобы
+    база не отдавала лишние колонки и таблицы.
+    """
+
+    def __init__(self, fields, requested=None):
+        names = [name.strip() for name in (requested or '').split(',')
+                 if name.strip()]
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            raise ValueError(
+                f'Неизвестные поля: {", ".join(unknown)}. '
+                f'Доступны: {", ".join(fields)}')
+        self.fields = {name: fields[name] for name in names or fields}
+
+    def prepare(self, queryset, ordering=(), through=None):
+        """Ограничить queryset нужными колонками.
+
+        through — имя связи, через которую queryset ссылается
+        на сериализуемые объекты (Timeline → post).
+        """
+        prefix = f'{through}__' if through else ''
+        only = {name.lstrip('-') for name in ordering}
+        related = {through} if through else set()
+        for field in self.fields.values():
+            only.update(prefix + name for name in field.only)
+            if field.related:
+                related.add(prefix + field.related)
+        if related:
+            # select_related() без аргументов подтянул бы все связи.
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+    def to_dict(self, obj):
+        return {name: field.getter(obj)
+                for name, field in self.fields.items()}
@@ -0,0 +1,65 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='group', slug='group',
+                                         description='description')
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='first, "quoted"')
+        Post.objects.create(author=cls.user, text='second')
+        Comment.objects.create(post=cls.post, author=cls.user,
+                               text='comment')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_profile_ndjson(self):
+        """Выгрузка автора в NDJSON: посты, затем комментарии."""
+        url = reverse('api:export_profile', kwargs={'username': 'author'})
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record['type'] for record in records],
+                         ['post', 'post', 'comment'])
+        self.assertEqual(records[0]['text'], 'first, "quoted"')
+        self.assertEqual(records[2]['post'], self.post.pk)
+
+    def test_group_csv(self):
+        """Выгрузка группы в CSV."""
+        url = reverse('api:export_group', kwargs={'slug': 'group'})
+        response = self.client.get(url, {'format': 'csv'})
+        self.assertIn('group-group.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][0], 'type')
+        self.assertEqual([row[0] for row in rows[1:]], ['post', 'comment'])
+        self.assertEqual(rows[1][5], 'first, "quoted"')
+
+    def test_export_requires_login(self):
+        """Выгрузка недоступна анонимам."""
+        self.client.logout()
+        url = reverse('api:export_group', kwargs={'slug': 'group'})
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_export_command(self):
+        """Команда export_posts пишет ту же выгрузку."""
+        out = StringIO()
+        call_command('export_posts', '--user=author', chunk_size=1,
+                     stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
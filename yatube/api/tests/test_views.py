@@ -0,0 +1,101 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='group', slug='group',
+                                         description='description')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'post {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='comment')
+
+    def get(self, url, client=None, **params):
+        response = (client or self.client).get(url, params)
+        body = b''.join(response.streaming_content
+                        if response.streaming else [response.content])
+        return response, json.loads(body)
+
+    def test_cursor_pagination(self):
+        """Посты отдаются страницами по курсору next."""
+        url = reverse('api:posts')
+        response, data = self.get(url, limit=3)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([post['id'] for post in data['results']],
+                         [post.pk for post in self.posts[:1:-1]])
+        _, data = self.get(url, limit=3, after=data['next'])
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[1].pk, self.posts[0].pk])
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields(self):
+        """?fields= ограничивает поля ответа и колонки запроса."""
+        url = reverse('api:posts')
+        with self.assertNumQueries(1):
+            _, data = self.get(url, fields='id,author')
+        self.assertEqual(data['results'][0],
+                         {'id': self.posts[-1].pk, 'author': 'author'})
+        response, data = self.get(url, fields='id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['error'])
+
+    def test_only_requested_columns_are_selected(self):
+        """Запрос к базе содержит только нужные колонки."""
+        with CaptureQueriesContext(connection) as context:
+            self.get(reverse('api:posts'), fields='id')
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_group_profile_and_comments(self):
+        """Посты группы, автора и комментарии поста."""
+        _, data = self.get(reverse('api:group_posts',
+                                   kwargs={'slug': self.group.slug}))
+        self.assertEqual(len(data['results']), 2)
+        self.assertTrue(all(post['group'] == 'group'
+                            for post in data['results']))
+        _, data = self.get(reverse('api:profile_posts',
+                                   kwargs={'username': 'reader'}))
+        self.assertEqual(data['results'], [])
+        _, data = self.get(reverse('api:post_comments',
+                                   kwargs={'post_id': self.posts[0].pk}))
+        self.assertEqual(data['results'][0]['text'], 'comment')
+        response, _ = self.get(reverse('api:group_posts',
+                                       kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_posts(self):
+        """Лента подписок доступна только авторизованным."""
+        url = reverse('api:follow_posts')
+        response, _ = self.get(url)
+        self.assertEqual(response.status_code, 401)
+        Follow.objects.create(user=self.reader, author=self.user)
+        client = Client()
+        client.force_login(self.reader)
+        _, data = self.get(url, client)
+        self.assertEqual(len(data['results']), 5)
+        _, first_page = self.get(url, client, limit=3, fields='id')
+        _, second_page = self.get(url, client, limit=3,
+                                  after=first_page['next'])
+        self.assertEqual(
+            [post['id'] for post in first_page['results'] + second_page[
+                'results']],
+            [post['id'] for post in data['results']])
+        self.assertIsNone(second_page['next'])
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    path('profile/<str:username>/posts/', views.profile_posts,
+         name='profile_posts'),
+    path('follow/posts/', views.follow_posts, name='follow_posts'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
+    path('export/profile/<str:username>/', views.export_profile,
+         name='export_profile'),
+    path('export/groups/<slug:slug>/', views.export_group,
+         name='export_group'),
+]
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from posts.models import Comment, Group, Post, Timeline, User
+from posts.paginators import CursorPaginator, TimelinePaginator
+
+from . import export
+from .serializers import COMMENT_FIELDS, POST_FIELDS, Serializer
+
+POST_ORDERING = ('-pub_date', '-id')
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+COMMENT_ORDERING = ('created', 'id')
+
+encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _stream(page, serializer):
+    yield '{"results":['
+    for position, obj in enumerate(page):
+        if position:
+            yield ','
+        yield encoder.encode(serializer.to_dict(obj))
+    yield '],"next":'
+    yield encoder.encode(page.next_cursor)
+    yield '}'
+
+
+def _page_size(request):
+    try:
+        limit = int(request.GET.get('limit', settings.POSTS_ON_PAGE))
+    except ValueError:
+        raise ValueError('Параметр limit должен быть числом')
+    return min(max(limit, 1), settings.API_PAGE_SIZE_MAX)
+
+
+def paginated_response(request, queryset, fields, ordering,
+                       paginator_class=CursorPaginator, through=None):
+    """Страница объектов после курсора ?after= в потоковом JSON.
+
+    Шаблоны не используются: JSON кодируется по одному объекту,
+    и ответ начинает уходить клиенту до конца сериализации.
+    """
+    try:
+        serializer = Serializer(fields, request.GET.get('fields'))
+        per_page = _page_size(request)
+    except ValueError as exc:
+        return error(str(exc), 400)
+    paginator = paginator_class(
+        serializer.prepare(queryset, ordering, through), per_page,
+        ordering=ordering)
+    page = paginator.get_cursor_page(request.GET.get('after'))
+    return StreamingHttpResponse(_stream(page, serializer),
+                                 content_type='application/json')
+
+
+@require_GET
+def posts(request):
+    return paginated_response(request, Post.objects.all(), POST_FIELDS,
+                              POST_ORDERING)
+
+
+@require_GET
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return error('Группа не найдена', 404)
+    return paginated_response(request, Post.objects.filter(group_id=group_id),
+                              POST_FIELDS, POST_ORDERING)
+
+
+@require_GET
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return error('Пользователь не найден', 404)
+    return paginated_response(
+        request, Post.objects.filter(author_id=author_id),
+        POST_FIELDS, POST_ORDERING)
+
+
+@require_GET
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', 401)
+    return paginated_response(
+        request, Timeline.objects.filter(user=request.user), POST_FIELDS,
+        TIMELINE_ORDERING, TimelinePaginator, through='post')
+
+
+@require_GET
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден', 404)
+    return paginated_response(
+        request, Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS, COMMENT_ORDERING)
+
+
+def export_response(request, records, filename):
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', 401)
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        return error(f'Неизвестный формат: {export_format}', 400)
+    response = StreamingHttpResponse(
+        export.render(records, export_format),
+        content_type=export.FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export_format}"')
+    return response
+
+
+@require_GET
+def export_profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error('Пользователь не найден', 404)
+    return export_response(
+        request,
+        export.author_records(author, settings.EXPORT_CHUNK_SIZE),
+        f'profile-{author.username}')
+
+
+@require_GET
+def export_group(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error('Группа не найдена', 404)
+    return export_response(
+        request, export.group_records(group, settings.EXPORT_CHUNK_SIZE),
+        f'group-{group.slug}')
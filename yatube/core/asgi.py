@@ -0,0 +1,123 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_environ(scope, body):
+    """WSGI-окружение по HTTP-соединению ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт путь байтами, упакованными в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        # HTTP/2 присылает куки отдельными заголовками, склеиваются они
+        # через "; ", как в ASGIHandler новых версий Django.
+        if name == 'HTTP_COOKIE':
+            value = value.rstrip('; ')
+            if name in environ:
+                value = f'{environ[name]}; {value}'
+        elif name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Django 2.2 не умеет ни ASGI, ни асинхронные представления, поэтому
+    запрос целиком выполняется в пуле из max_workers потоков: вызов
+    приложения, перебор тела ответа и close() идут в одном потоке,
+    как у WSGI-сервера, и соединения с базой не переходят между
+    потоками. Цикл событий только принимает тело запроса и отдаёт
+    ответ, не держа поток на медленных клиентах.
+    """
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Тип соединения {scope["type"]} '
+                             f'не поддерживается')
+        body = await self.read_body(receive)
+        if body is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.run, loop, build_environ(scope, body), send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    def run(self, loop, environ, send):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not started:
+                    emit({'type': 'http.response.start', **response})
+                    started = True
+                if chunk:
+                    emit({'type': 'http.response.body', 'body': chunk,
+                          'more_body': True})
+            if not started:
+                emit({'type': 'http.response.start', **response})
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
@@ -0,0 +1,271 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    """CREATE TABLE IF NOT EXISTS cache_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    )""",
+    'INSERT OR IGNORE INTO cache_stats VALUES (1, 0, 0)',
+    # Исправляет счётчики файлов, где перезапись через REPLACE
+    # не вычитала старые записи.
+    """UPDATE cache_stats SET
+        entries = (SELECT COUNT(*) FROM cache),
+        size = (SELECT COALESCE(SUM(size), 0) FROM cache)""",
+    """CREATE TRIGGER IF NOT EXISTS cache_stats_insert
+        AFTER INSERT ON cache BEGIN
+            UPDATE cache_stats SET entries = entries + 1,
+                                   size = size + new.size;
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS cache_stats_delete
+        AFTER DELETE ON cache BEGIN
+            UPDATE cache_stats SET entries = entries - 1,
+                                   size = size - old.size;
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS cache_stats_update
+        AFTER UPDATE OF size ON cache BEGIN
+            UPDATE cache_stats SET size = size - old.size + new.size;
+        END""",
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов одного хоста.
+
+    Файл открыт в режиме WAL, поэтому чтения не блокируются записью.
+    Записи вытесняются по давности использования (LRU), когда их
+    больше MAX_ENTRIES или суммарный размер больше MAX_SIZE байт.
+    Целые числа хранятся как INTEGER, поэтому incr атомарен.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+        }
+    }
+    """
+
+    # Время последнего обращения обновляется не чаще раза в секунду,
+    # чтобы чтения почти никогда не превращались в записи.
+    ACCESS_RESOLUTION = 1.0
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._max_size = params.get('OPTIONS', {}).get('MAX_SIZE')
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self._path, timeout=30,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _dumps(value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    @staticmethod
+    def _size(key, stored):
+        return len(key) + (len(stored) if isinstance(stored, bytes) else 8)
+
+    def _write(self, connection, key, value, timeout, replace):
+        stored = self._dumps(value)
+        now = time.time()
+        row = (key, stored, self.get_backend_timeout(timeout), now,
+               self._size(key, stored))
+        if replace:
+            # Не REPLACE: он удаляет старую строку без триггеров
+            # (recursive_triggers выключен), и cache_stats растёт.
+            connection.execute(
+                'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+                'expires = excluded.expires, accessed = excluded.accessed, '
+                'size = excluded.size', row)
+            return True
+        connection.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+        cursor = connection.execute(
+            'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)', row)
+        return cursor.rowcount > 0
+
+    def _cull(self, connection):
+        entries, size = connection.execute(
+            'SELECT entries, size FROM cache_stats').fetchone()
+        over_size = self._max_size is not None and size > self._max_size
+        if entries <= self._max_entries and not over_size:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?',
+                           (time.time(),))
+        entries, size = connection.execute(
+            'SELECT entries, size FROM cache_stats').fetchone()
+        if self._cull_frequency == 0:
+            if entries > self._max_entries or over_size:
+                connection.execute('DELETE FROM cache')
+            return
+        if entries > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)',
+                (max(entries // self._cull_frequency, 1),))
+        while (self._max_size is not None
+               and connection.execute('SELECT size FROM cache_stats')
+               .fetchone()[0] > self._max_size):
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)',
+                (max(entries // (self._cull_frequency * 4), 1),))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            added = self._write(connection, key, value, timeout,
+                                replace=False)
+            if added:
+                self._cull(connection)
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._write(connection, key, value, timeout, replace=True)
+            self._cull(connection)
+        return []
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made_keys = {}
+        for key in keys:
+            made_key = self.make_key(key, version=version)
+            self.validate_key(made_key)
+            made_keys[made_key] = key
+        now = time.time()
+        connection = self._connection()
+        placeholders = ', '.join('?' * len(made_keys))
+        rows = connection.execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            (*made_keys, now)).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if now - accessed > self.ACCESS_RESOLUTION]
+        if stale:
+            with connection:
+                connection.execute('BEGIN')
+                connection.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?',
+                    [(now, key) for key in stale])
+        return {made_keys[key]: self._loads(value)
+                for key, value, _ in rows}
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), key, time.time()))
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        made_keys = []
+        for key in keys:
+            made_key = self.make_key(key, version=version)
+            self.validate_key(made_key)
+            made_keys.append((made_key,))
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN')
+            connection.executemany('DELETE FROM cache WHERE key = ?',
+                                   made_keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self._loads(row[0]) + delta
+            stored = self._dumps(value)
+            connection.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (stored, self._size(key, stored), key))
+        return value
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт всё время работы потока: открывать файл
+        # и проверять схему на каждый запрос слишком дорого.
+        pass
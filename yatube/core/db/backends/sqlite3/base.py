@@ -0,0 +1,91 @@
+from urllib.parse import quote
+
+from django.db.backends.sqlite3 import base
+
+from .pool import get_pool
+
+# Значения по умолчанию для боевой нагрузки: WAL не блокирует
+# читателей во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность, busy_timeout ждёт блокировку вместо
+# немедленной ошибки «database is locked».
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Режим журнала хранится в самом файле и не может меняться
+# соединением только для чтения.
+READ_ONLY_SKIPPED = ('journal_mode',)
+
+
+def apply_pragmas(connection, pragmas, read_only=False):
+    for name, value in pragmas.items():
+        if read_only and name in READ_ONLY_SKIPPED:
+            continue
+        connection.execute(f'PRAGMA {name} = {value}')
+    if read_only:
+        connection.execute('PRAGMA query_only = ON')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с настройками для конкурентной нагрузки.
+
+    OPTIONS['pragmas'] дополняет и переопределяет DEFAULT_PRAGMAS,
+    OPTIONS['read_only'] открывает файл только для чтения — такие
+    псевдонимы получают чтения от core.db.routers.ReadWriteRouter.
+    Транзакции начинаются с BEGIN IMMEDIATE: запись берёт блокировку
+    сразу, и параллельные писатели встают в очередь busy_timeout
+    вместо взаимной блокировки при повышении уровня блокировки.
+
+    OPTIONS['pool'] ({'max_size': ..., 'idle_timeout': ...}) включает
+    пул: закрытое Django соединение возвращается в пул и выдаётся
+    следующему запросу без открытия файла, установки pragma
+    и регистрации функций. Базы в памяти в пул не попадают.
+    """
+
+    pool = None
+
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.get('pragmas', {})}
+        self.read_only = options.get('read_only', False)
+        kwargs = super().get_connection_params()
+        for name in ('pragmas', 'read_only', 'pool'):
+            kwargs.pop(name, None)
+        database = kwargs['database']
+        if self.read_only and not database.startswith('file:'):
+            kwargs['database'] = f'file:{quote(database)}?mode=ro'
+        if 'pool' in options and not self.is_in_memory_db():
+            self.pool = get_pool(self.alias, kwargs['database'],
+                                 options['pool'])
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        if self.pool is None:
+            return self._open(conn_params)
+        return self.pool.checkout(lambda: self._open(conn_params))
+
+    def _open(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas, self.read_only)
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        # Соединение из прерванной транзакции Django ещё откатит
+        # и пометит, его не отдаём другим запросам.
+        if self.in_atomic_block:
+            self.pool.discard(self.connection)
+        else:
+            self.pool.checkin(self.connection)
+
+    def _start_transaction_under_autocommit(self):
+        if self.read_only:
+            self.cursor().execute('BEGIN')
+        else:
+            self.cursor().execute('BEGIN IMMEDIATE')
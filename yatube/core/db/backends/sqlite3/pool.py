@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def is_healthy(connection):
+    try:
+        connection.execute('SELECT 1').fetchone()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """Простаивающие соединения одного псевдонима базы.
+
+    Выдача не блокируется: если свободных нет, открывается новое
+    соединение. max_size ограничивает число простаивающих — лишние
+    при возврате закрываются. Перед выдачей соединение проверяется
+    запросом SELECT 1 и отбрасывается, если простояло дольше
+    idle_timeout секунд.
+    """
+
+    def __init__(self, database, max_size, idle_timeout):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = []
+        self.in_use = 0
+        self.counts = {'created': 0, 'reused': 0,
+                       'discarded': 0, 'overflow': 0}
+
+    def _count(self, name, in_use):
+        with self._lock:
+            self.counts[name] += 1
+            self.in_use += in_use
+
+    def checkout(self, connect):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, returned_at = self._idle.pop()
+            if (time.monotonic() - returned_at <= self.idle_timeout
+                    and is_healthy(connection)):
+                self._count('reused', 1)
+                return connection
+            connection.close()
+            self._count('discarded', 0)
+        connection = connect()
+        self._count('created', 1)
+        return connection
+
+    def checkin(self, connection):
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            self.discard(connection)
+            return
+        with self._lock:
+            self.in_use -= 1
+            keep = len(self._idle) < self.max_size
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self.counts['overflow'] += 1
+        if not keep:
+            connection.close()
+
+    def discard(self, connection):
+        self._count('discarded', -1)
+        connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'database': self.database,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                **self.counts,
+            }
+
+
+def get_pool(alias, database, options):
+    """Пул псевдонима; смена файла базы заводит новый пул."""
+    with _lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.database != database:
+            if pool is not None:
+                pool.clear()
+            pool = _pools[alias] = ConnectionPool(
+                database, options.get('max_size', 10),
+                options.get('idle_timeout', 300))
+        return pool
+
+
+def pool_stats():
+    with _lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in sorted(pools.items())}
@@ -0,0 +1,52 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def start_request(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def finish_request():
+    """Сбросить состояние запроса и сообщить, была ли в нём запись."""
+    wrote = getattr(_state, 'wrote', False)
+    start_request()
+    return wrote
+
+
+class ReadWriteRouter:
+    """Чтения приложений READ_REPLICA_APPS — в READ_DATABASES.
+
+    Запись и миграции идут в default. Чтения остаются на default
+    внутри транзакции (иначе не видны незафиксированные изменения)
+    и в запросах, закреплённых за основной базой после записи
+    (см. core.middleware.PrimaryPinMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = [alias for alias in settings.READ_DATABASES
+                    if alias in connections.databases]
+        if (not replicas
+                or model._meta.app_label not in settings.READ_REPLICA_APPS
+                or getattr(_state, 'pinned', False)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Реплика может отставать: дальнейшие чтения этого запроса
+        # тоже идут в основную базу.
+        _state.wrote = True
+        _state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
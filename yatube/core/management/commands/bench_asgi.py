@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+from core.asgi import WsgiToAsgi, build_environ
+
+from . import bench_views
+
+
+class Command(bench_views.Command):
+    help = ('Сравнивает пропускную способность страниц под WSGI '
+            '(один синхронный воркер) и под yatube.asgi при заданном '
+            'числе одновременных соединений. Данные создаёт seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Число замеряемых запросов на страницу')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Одновременных соединений для ASGI')
+        parser.add_argument('--views', default=','.join(bench_views.VIEWS),
+                            help='Страницы через запятую')
+        parser.add_argument('--pages', type=int, default=5,
+                            help='Сколько первых страниц лент запрашивать')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = bench_views.random.Random(options['seed'])
+        self.pages = options['pages']
+        self._load_targets()
+        client = Client()
+        client.force_login(self.reader)
+        self.cookie = (f'{settings.SESSION_COOKIE_NAME}='
+                       f'{client.cookies[settings.SESSION_COOKIE_NAME].value}')
+        self.wsgi = get_wsgi_application()
+        self.asgi = WsgiToAsgi(self.wsgi, options['concurrency'])
+
+        self.stdout.write(f'{"view":<14}{"server":<7}{"rps":>9}{"p50":>9}'
+                          f'{"p95":>9}{"p99":>9}  (мс)')
+        for view in options['views'].split(','):
+            scopes = [self._scope(view) for _ in range(options['requests'])]
+            for server, measure in (('wsgi', self._wsgi),
+                                    ('asgi', self._asgi)):
+                start = time.perf_counter()
+                timings, statuses = measure(scopes, options['concurrency'])
+                elapsed = time.perf_counter() - start
+                timings.sort()
+                self.stdout.write(
+                    f'{view:<14}{server:<7}{len(timings) / elapsed:>9.0f}'
+                    + ''.join(f'{bench_views.percentile(timings, p):>9.1f}'
+                              for p in (50, 95, 99)))
+                errors = {status: count for status, count
+                          in statuses.items() if status >= 400}
+                if errors:
+                    self.stderr.write(f'{view} {server}: ответы с ошибкой '
+                                      f'{errors}')
+        self.asgi.executor.shutdown()
+
+    def _scope(self, view):
+        path, params = self._url(view)
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': urlencode(params).encode(),
+            'headers': [(b'host', b'localhost'),
+                        (b'cookie', self.cookie.encode())],
+        }
+
+    def _wsgi(self, scopes, concurrency):
+        timings = []
+        statuses = Counter()
+
+        def start_response(status, headers, exc_info=None):
+            statuses[int(status.split(' ', 1)[0])] += 1
+
+        for scope in scopes:
+            start = time.perf_counter()
+            result = self.wsgi(build_environ(scope, b''), start_response)
+            b''.join(result)
+            result.close()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, statuses
+
+    def _asgi(self, scopes, concurrency):
+        timings = []
+        statuses = Counter()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses[message['status']] += 1
+
+        async def connection(queue):
+            while queue:
+                scope = queue.pop()
+                start = time.perf_counter()
+                await self.asgi(scope, receive, send)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        async def run():
+            queue = list(scopes)
+            await asyncio.gather(*(connection(queue)
+                                   for _ in range(concurrency)))
+
+        asyncio.run(run())
+        return timings, statuses
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость SQLiteCache с LocMemCache '
+            'и FileBasedCache на типичных операциях.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=5000,
+                            help='Число операций каждого вида')
+        parser.add_argument('--value-size', type=int, default=2048,
+                            help='Размер значения в байтах')
+
+    def handle(self, *args, **options):
+        count = options['operations']
+        value = 'x' * options['value_size']
+        with tempfile.TemporaryDirectory() as directory:
+            params = {'OPTIONS': {'MAX_ENTRIES': count * 2}}
+            backends = {
+                'LocMemCache': LocMemCache('bench', params),
+                'FileBasedCache': FileBasedCache(
+                    os.path.join(directory, 'files'), params),
+                'SQLiteCache': SQLiteCache(
+                    os.path.join(directory, 'cache.sqlite3'), params),
+            }
+            self.stdout.write(
+                f'{"backend":<16}{"set":>12}{"get":>12}'
+                f'{"get_many(10)":>14}{"incr":>12}  (операций в секунду)')
+            for name, backend in backends.items():
+                rates = self._measure(backend, count, value)
+                self.stdout.write(
+                    f'{name:<16}' + ''.join(
+                        f'{rate:>{width}.0f}' for rate, width
+                        in zip(rates, (12, 12, 14, 12))))
+
+    def _measure(self, backend, count, value):
+        keys = [f'key{number}' for number in range(count)]
+        rates = []
+        start = time.perf_counter()
+        for key in keys:
+            backend.set(key, value)
+        rates.append(count / (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for key in keys:
+            backend.get(key)
+        rates.append(count / (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for offset in range(0, count, 10):
+            backend.get_many(keys[offset:offset + 10])
+        rates.append(count / 10 / (time.perf_counter() - start))
+
+        backend.set('counter', 0)
+        start = time.perf_counter()
+        for _ in range(count):
+            backend.incr('counter')
+        rates.append(count / (time.perf_counter() - start))
+        return rates
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from core.db.backends.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+from posts.models import Post, User
+
+MODES = {
+    # Настройки SQLite и Django по умолчанию.
+    'default': {
+        'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'begin': 'BEGIN',
+        'read_only': False,
+    },
+    'tuned': {
+        'pragmas': DEFAULT_PRAGMAS,
+        'begin': 'BEGIN IMMEDIATE',
+        'read_only': True,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность чтения ленты во время '
+            'непрерывной записи комментариев: журнал SQLite по умолчанию '
+            'против WAL с настройками core.db.backends.sqlite3. '
+            'Работает на временной копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер имеет смысл только для SQLite')
+        post_id = Post.objects.values_list('pk', flat=True).first()
+        author_id = User.objects.values_list('pk', flat=True).first()
+        if post_id is None or author_id is None:
+            raise CommandError('Нет данных: сначала запустите seed_bench')
+        queryset = Post.objects.select_related('author', 'group').order_by(
+            '-pub_date', '-id')[:10]
+        sql, params = queryset.query.get_compiler(
+            DEFAULT_DB_ALIAS).as_sql()
+        self.read_sql = sql.replace('%s', '?'), params
+        self.write_args = post_id, author_id
+
+        self.stdout.write(f'{"mode":<10}{"reads/s":>10}{"writes/s":>10}'
+                          f'{"read err":>10}{"write err":>10}')
+        connection.ensure_connection()
+        for mode, config in MODES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                copy = sqlite3.connect(path)
+                connection.connection.backup(copy)
+                copy.close()
+                result = self._run(path, config, options)
+            self.stdout.write(
+                f'{mode:<10}{result["reads"]:>10.0f}{result["writes"]:>10.0f}'
+                f'{result["read_errors"]:>10}{result["write_errors"]:>10}')
+
+    def _connect(self, path, config, read_only):
+        database = f'file:{path}?mode=ro' if read_only else path
+        connection = sqlite3.connect(database, uri=True, timeout=5,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        apply_pragmas(connection, config['pragmas'], read_only)
+        return connection
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def _reader(self, path, config):
+        connection = self._connect(path, config, config['read_only'])
+        sql, params = self.read_sql
+        while time.perf_counter() < self.deadline:
+            try:
+                connection.execute(sql, params).fetchall()
+                self._count('reads')
+            except sqlite3.OperationalError:
+                self._count('read_errors')
+        connection.close()
+
+    def _writer(self, path, config):
+        connection = self._connect(path, config, read_only=False)
+        post_id, author_id = self.write_args
+        while time.perf_counter() < self.deadline:
+            try:
+                connection.execute(config['begin'])
+                connection.execute(
+                    'INSERT INTO posts_comment '
+                    '(post_id, author_id, text, created) '
+                    'VALUES (?, ?, ?, ?)',
+                    (post_id, author_id, 'bench',
+                     timezone.now().strftime('%Y-%m-%d %H:%M:%S.%f')))
+                connection.execute(
+                    'UPDATE posts_post SET comments_count = '
+                    'comments_count + 1 WHERE id = ?', (post_id,))
+                connection.execute('COMMIT')
+                self._count('writes')
+            except sqlite3.OperationalError:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                self._count('write_errors')
+        connection.close()
+
+    def _run(self, path, config, options):
+        # Режим журнала хранится в файле: переключаем его заранее.
+        self._connect(path, config, read_only=False).close()
+        self.counts = {'reads': 0, 'writes': 0,
+                       'read_errors': 0, 'write_errors': 0}
+        self.lock = threading.Lock()
+        self.deadline = time.perf_counter() + options['seconds']
+        threads = (
+            [threading.Thread(target=self._reader, args=(path, config))
+             for _ in range(options['readers'])]
+            + [threading.Thread(target=self._writer, args=(path, config))
+               for _ in range(options['writers'])]
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.counts['reads'] /= options['seconds']
+        self.counts['writes'] /= options['seconds']
+        return self.counts
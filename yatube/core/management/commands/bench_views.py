@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import resource
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.metrics import RequestMetrics
+from posts.models import Group, Post, User
+
+VIEWS = ('index', 'group_list', 'profile', 'post_detail', 'follow_index')
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(round(percent / 100 * len(values) + 0.5), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return peak_rss_mb()
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def peak_rss_mb():
+    # На Linux ru_maxrss в килобайтах.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер основных страниц через тестовый клиент: '
+            'p50/p95/p99 времени ответа, SQL-запросы на запрос и RSS. '
+            'Данные для замера создаёт команда seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Число замеряемых запросов на страницу')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='Число запросов прогрева на страницу')
+        parser.add_argument('--views', default=','.join(VIEWS),
+                            help='Страницы через запятую')
+        parser.add_argument('--pages', type=int, default=5,
+                            help='Сколько первых страниц лент запрашивать')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кеш перед каждым запросом')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output',
+                            help='Сохранить результаты в JSON для сравнения')
+
+    def handle(self, *args, **options):
+        views = options['views'].split(',')
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(f'Неизвестные страницы: {", ".join(unknown)}')
+        self.random = random.Random(options['seed'])
+        self.pages = options['pages']
+        self._load_targets()
+        client = Client()
+        client.force_login(self.reader)
+
+        results = {}
+        self.stdout.write(
+            f'{"view":<14}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}'
+            f'{"queries":>9}{"rss":>9}  (мс, МБ)')
+        for view in views:
+            for _ in range(options['warmup']):
+                client.get(*self._url(view))
+            results[view] = self._measure(client, view, options)
+            row = results[view]
+            self.stdout.write(
+                f'{view:<14}' + ''.join(
+                    f'{row[name]:>9.1f}' for name in
+                    ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+                     'queries_avg', 'rss_mb')))
+            if row['errors']:
+                self.stderr.write(f'{view}: ответы с ошибкой {row["errors"]}')
+        self.stdout.write(f'Пиковый RSS: {peak_rss_mb():.1f} МБ')
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'options': {key: options[key] for key in
+                                       ('requests', 'pages', 'cold')},
+                           'views': results,
+                           'peak_rss_mb': peak_rss_mb()},
+                          output, indent=2, ensure_ascii=False)
+
+    def _load_targets(self):
+        self.authors = list(
+            User.objects.annotate(total=Count('posts'))
+            .filter(total__gt=0).order_by('-total')
+            .values_list('username', flat=True)[:500])
+        self.groups = list(Group.objects.values_list('slug', flat=True))
+        self.posts = list(Post.objects.order_by('-pk')
+                          .values_list('pk', flat=True)[:5000])
+        self.reader = (User.objects.annotate(total=Count('follower'))
+                       .order_by('-total').first())
+        if not self.posts or self.reader is None:
+            raise CommandError('Нет данных: сначала запустите seed_bench')
+
+    def _url(self, view):
+        page = {'page': self.random.randint(1, self.pages)}
+        if view == 'group_list':
+            if not self.groups:
+                raise CommandError('Нет групп для замера group_list')
+            slug = self.random.choice(self.groups)
+            return reverse('posts:group_list', kwargs={'slug': slug}), page
+        if view == 'profile':
+            username = self.random.choice(self.authors)
+            return (reverse('posts:profile', kwargs={'username': username}),
+                    page)
+        if view == 'post_detail':
+            post_id = self.random.choice(self.posts)
+            return reverse('posts:post_detail',
+                           kwargs={'post_id': post_id}), {}
+        return reverse(f'posts:{view}'), page
+
+    def _measure(self, client, view, options):
+        timings = []
+        queries = 0
+        statuses = Counter()
+        for _ in range(options['requests']):
+            url, params = self._url(view)
+            if options['cold']:
+                cache.clear()
+            metrics = RequestMetrics()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                start = time.perf_counter()
+                response = client.get(url, params)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries += metrics.queries
+            statuses[response.status_code] += 1
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'max_ms': timings[-1],
+            'queries_avg': queries / len(timings),
+            'rss_mb': current_rss_mb(),
+            'errors': {str(status): count for status, count
+                       in statuses.items() if status >= 400},
+        }
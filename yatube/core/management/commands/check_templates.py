@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import compile_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны из каталогов загрузчиков и '
+            'завершается с ошибкой, если хоть один не компилируется.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        compiled, errors = compile_templates()
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Не компилируются шаблоны: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {compiled} за '
+            f'{(time.perf_counter() - start) * 1000:.0f} мс'))
@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def replicate(source_path, target_path):
+    """Скопировать базу в реплику через backup API SQLite.
+
+    Копия согласована: backup читает снимок источника, а читатели
+    реплики видят либо старое, либо новое состояние целиком.
+    """
+    source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+    target = sqlite3.connect(target_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+class Command(BaseCommand):
+    help = ('Локальная замена репликации: периодически копирует основную '
+            'базу SQLite в файлы реплик из READ_DATABASES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между копированиями, секунд')
+        parser.add_argument('--once', action='store_true',
+                            help='Скопировать один раз и выйти')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        targets = {connections[alias].settings_dict['NAME']
+                   for alias in settings.READ_DATABASES} - {source}
+        if not targets:
+            self.stdout.write('Реплики не настроены: READ_DATABASES '
+                              'читают основную базу')
+            return
+        while True:
+            start = time.perf_counter()
+            for target in sorted(targets):
+                replicate(source, target)
+            self.stdout.write(
+                f'Реплик обновлено: {len(targets)} за '
+                f'{(time.perf_counter() - start) * 1000:.0f} мс')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.template.base import Template
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL-запросы, время БД и шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def get_request_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+def set_request_metrics(metrics):
+    _local.metrics = metrics
+
+
+def _timed_render(self, context):
+    metrics = get_request_metrics()
+    if metrics is None or metrics.rendering:
+        return _timed_render.original(self, context)
+    metrics.rendering = True
+    start = time.perf_counter()
+    try:
+        return _timed_render.original(self, context)
+    finally:
+        metrics.template_time += time.perf_counter() - start
+        metrics.rendering = False
+
+
+def install_template_timer():
+    """Обернуть Template._render, учитывая только внешний шаблон."""
+    if Template._render is not _timed_render:
+        _timed_render.original = Template._render
+        Template._render = _timed_render
+
+
+class ViewStats:
+    def __init__(self):
+        self.count = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.wall_ms = 0.0
+        self.max_wall_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, queries, db_ms, template_ms, wall_ms):
+        self.count += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.db_ms += db_ms
+        self.template_ms += template_ms
+        self.wall_ms += wall_ms
+        self.max_wall_ms = max(self.max_wall_ms, wall_ms)
+        for position, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if wall_ms <= bound:
+                break
+        else:
+            position = len(HISTOGRAM_BUCKETS_MS)
+        self.histogram[position] += 1
+
+    def as_dict(self):
+        labels = [f'<={bound}ms' for bound in HISTOGRAM_BUCKETS_MS]
+        labels.append(f'>{HISTOGRAM_BUCKETS_MS[-1]}ms')
+        return {
+            'count': self.count,
+            'queries_avg': round(self.queries / self.count, 2),
+            'queries_max': self.max_queries,
+            'db_ms_avg': round(self.db_ms / self.count, 3),
+            'template_ms_avg': round(self.template_ms / self.count, 3),
+            'wall_ms_avg': round(self.wall_ms / self.count, 3),
+            'wall_ms_max': round(self.max_wall_ms, 3),
+            'wall_ms_histogram': dict(zip(labels, self.histogram)),
+        }
+
+
+class MetricsRegistry:
+    """Агрегированные в процессе метрики по именам представлений."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(ViewStats)
+        self._counters = defaultdict(int)
+
+    def record(self, view_name, queries, db_ms, template_ms, wall_ms):
+        with self._lock:
+            self._views[view_name].add(queries, db_ms, template_ms, wall_ms)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'views': {name: stats.as_dict()
+                          for name, stats in sorted(self._views.items())},
+                'counters': dict(sorted(self._counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._counters.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,83 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .db import routers
+from .metrics import (RequestMetrics, install_template_timer, registry,
+                      set_request_metrics)
+
+logger = logging.getLogger(__name__)
+
+
+class ViewMetricsMiddleware:
+    """Замеряет SQL-запросы, время БД, шаблонов и запроса целиком.
+
+    Результат отдаётся в заголовке Server-Timing и копится в
+    core.metrics.registry по имени представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        set_request_metrics(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            set_request_metrics(None)
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = metrics.db_time * 1000
+        template_ms = metrics.template_time * 1000
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={db_ms:.2f};desc="{metrics.queries} queries"',
+            f'tpl;dur={template_ms:.2f}',
+            f'total;dur={wall_ms:.2f}',
+        ))
+        match = request.resolver_match
+        if match is None:
+            return response
+        view_name = match.view_name
+        registry.record(view_name, metrics.queries, db_ms, template_ms,
+                        wall_ms)
+        budget = settings.VIEW_QUERY_BUDGETS.get(
+            view_name, settings.VIEW_QUERY_BUDGET_DEFAULT)
+        if metrics.queries > budget:
+            logger.warning(
+                'Представление %s выполнило %d SQL-запросов при бюджете %d',
+                view_name, metrics.queries, budget)
+        return response
+
+
+class PrimaryPinMiddleware:
+    """Закрепляет браузер за основной базой после его записи.
+
+    Пока жива кука PRIMARY_PIN_COOKIE, чтения идут мимо реплик,
+    и пользователь сразу видит свои изменения, например новый пост
+    на странице профиля после редиректа из PostCreate.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request(
+            pinned=settings.PRIMARY_PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote:
+            response.set_cookie(settings.PRIMARY_PIN_COOKIE, '1',
+                                max_age=settings.PRIMARY_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def isolated_caches(directory):
+    """CACHES с файлами кеша в directory вместо общих."""
+    return {
+        alias: dict(config,
+                    LOCATION=os.path.join(directory, f'{alias}.sqlite3'))
+        for alias, config in settings.CACHES.items()
+    }
+
+
+class TestRunner(DiscoverRunner):
+    """Запуск тестов со своим файлом кеша.
+
+    Тесты очищают кеш и оставляют в нём свои ключи: общий кеш
+    запущенного сервера они не трогают.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.mkdtemp(prefix='yatube-test-cache-')
+        self.cache_settings = override_settings(
+            CACHES=isolated_caches(self.cache_directory))
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
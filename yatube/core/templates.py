@@ -0,0 +1,52 @@
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена всех файлов в каталогах, где ищут загрузчики движка."""
+    names = set()
+    for loader in engine.template_loaders:
+        # Кешируемый загрузчик сам каталогов не знает.
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for name in files:
+                        path = os.path.relpath(
+                            os.path.join(root, name), directory)
+                        names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def compile_templates():
+    """Загрузить и скомпилировать все шаблоны движков Django.
+
+    С кешируемым загрузчиком скомпилированные шаблоны остаются
+    в памяти процесса. Возвращает число скомпилированных шаблонов
+    и список пар (имя, ошибка).
+    """
+    compiled = 0
+    errors = []
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors.append((name, error))
+            else:
+                compiled += 1
+    return compiled, errors
+
+
+def preload_templates():
+    """Прогреть кеш шаблонов при старте воркера."""
+    compiled, errors = compile_templates()
+    for name, error in errors:
+        logger.error('Шаблон %s не компилируется: %s', name, error)
+    return compiled
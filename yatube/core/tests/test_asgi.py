@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from ..asgi import WsgiToAsgi, build_environ
+
+
+class WsgiToAsgiTest(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def wsgi_application(self, environ, start_response):
+        self.calls.append((environ, threading.current_thread().name))
+        start_response('201 Created', [('Content-Type', 'text/plain')])
+        return iter([b'one', b'', environ['wsgi.input'].read()])
+
+    def request(self, messages, scope=None):
+        application = WsgiToAsgi(self.wsgi_application, 2)
+        self.addCleanup(application.executor.shutdown)
+        sent = []
+        queue = list(messages)
+
+        async def receive():
+            return queue.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = scope or {'type': 'http', 'method': 'POST',
+                          'path': '/posts/', 'query_string': b'page=2',
+                          'headers': [(b'content-type', b'text/plain'),
+                                      (b'x-tag', b'a'), (b'x-tag', b'b')]}
+        asyncio.run(application(scope, receive, send))
+        return sent
+
+    def test_response(self):
+        """Ответ WSGI отдаётся по частям, тело запроса собирается."""
+        sent = self.request([
+            {'type': 'http.request', 'body': b'he', 'more_body': True},
+            {'type': 'http.request', 'body': b'llo'},
+        ])
+        self.assertEqual(sent[0], {
+            'type': 'http.response.start', 'status': 201,
+            'headers': [(b'content-type', b'text/plain')]})
+        self.assertEqual(
+            [message['body'] for message in sent[1:]],
+            [b'one', b'hello', b''])
+        self.assertFalse(sent[-1].get('more_body', False))
+        _, thread = self.calls[0]
+        self.assertTrue(thread.startswith('asgi'))
+
+    def test_build_environ(self):
+        """Заголовки и путь переводятся в WSGI-окружение, куки
+        из нескольких заголовков склеиваются через "; "."""
+        environ = build_environ({
+            'method': 'GET', 'path': '/profile/тест/',
+            'query_string': b'page=2',
+            'headers': [(b'content-type', b'text/plain'),
+                        (b'x-tag', b'a'), (b'x-tag', b'b'),
+                        (b'cookie', b'sessionid=abc;'),
+                        (b'cookie', b'csrftoken=def')],
+        }, b'')
+        self.assertEqual(environ['PATH_INFO'],
+                         '/profile/тест/'.encode().decode('latin-1'))
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'a,b')
+        self.assertEqual(environ['HTTP_COOKIE'],
+                         'sessionid=abc; csrftoken=def')
+
+    def test_disconnect_before_body(self):
+        """Отключившийся клиент не доходит до приложения."""
+        self.assertEqual(self.request([{'type': 'http.disconnect'}]), [])
+        self.assertEqual(self.calls, [])
+
+    def test_lifespan(self):
+        """Запуск и остановка подтверждаются серверу."""
+        sent = self.request(
+            [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}],
+            scope={'type': 'lifespan'})
+        self.assertEqual([message['type'] for message in sent],
+                         ['lifespan.startup.complete',
+                          'lifespan.shutdown.complete'])
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Post, Timeline, UserCounters
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('seed_bench', users=20, posts=200, follows=60,
+                     comments=100, groups=3, images=2, seed=1,
+                     stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_bench(self):
+        """seed_bench создаёт связанные данные и пересчитывает ленты."""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(max(dates) - min(dates), timedelta(days=1))
+        follows = Follow.objects.count()
+        self.assertGreater(follows, 0)
+        self.assertEqual(
+            sum(UserCounters.objects.values_list('followers_count',
+                                                 flat=True)),
+            follows)
+        self.assertTrue(Timeline.objects.exists())
+
+    def test_bench_views(self):
+        """bench_views замеряет все страницы и сохраняет результат."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_views', requests=3, warmup=1, seed=1,
+                         output=path, stdout=StringIO(), stderr=StringIO())
+            with open(path) as output:
+                results = json.load(output)
+        self.assertEqual(set(results['views']), {
+            'index', 'group_list', 'profile', 'post_detail', 'follow_index'})
+        for view in results['views'].values():
+            self.assertEqual(view['errors'], {})
+            self.assertLessEqual(view['p50_ms'], view['p99_ms'])
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from multiprocessing import get_context
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def _increment(path):
+    cache = SQLiteCache(path, {})
+    for _ in range(50):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = f'{self.directory}/cache.sqlite3'
+        self.cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_ENTRIES': 5}})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """Кеш хранит, обновляет и удаляет значения."""
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.cache.set('expired', 'value', timeout=0)
+        self.assertIsNone(self.cache.get('expired'))
+        self.assertTrue(self.cache.add('expired', 'fresh'))
+        self.cache.delete('key')
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_incr(self):
+        """incr увеличивает число и требует существующий ключ."""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_is_atomic_across_processes(self):
+        """Параллельные процессы не теряют инкременты."""
+        self.cache.set('counter', 0)
+        context = get_context('fork')
+        workers = [context.Process(target=_increment, args=(self.path,))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        for number in range(5):
+            self.cache.set(f'key{number}', number)
+        self.cache.ACCESS_RESOLUTION = -1
+        self.cache.get('key0')
+        self.cache.set('key5', 5)
+        self.assertTrue(self.cache.has_key('key0'))
+        self.assertFalse(self.cache.has_key('key1'))
+
+    def test_size_limit(self):
+        """Суммарный размер записей не превышает MAX_SIZE."""
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_SIZE': 1000}})
+        for number in range(10):
+            cache.set(f'key{number}', 'x' * 300)
+        stored = sum(cache.has_key(f'key{number}') for number in range(10))
+        self.assertLessEqual(stored, 3)
+        self.assertTrue(cache.has_key('key9'))
+
+    def test_overwrite_keeps_stats(self):
+        """Перезапись ключа не раздувает cache_stats."""
+        cache = SQLiteCache(self.path, {
+            'OPTIONS': {'MAX_ENTRIES': 100, 'MAX_SIZE': 10000}})
+        for _ in range(200):
+            cache.set('key', 'x' * 100)
+        connection = cache._connection()
+        self.assertEqual(
+            connection.execute('SELECT entries, size FROM cache_stats')
+            .fetchone(),
+            connection.execute('SELECT COUNT(*), SUM(size) FROM cache')
+            .fetchone())
+        cache.set('other', 'value')
+        self.assertEqual(cache.get('other'), 'value')
+        self.assertEqual(cache.get('key'), 'x' * 100)
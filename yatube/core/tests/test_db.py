@@ -0,0 +1,260 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..db import routers
+from ..db.backends.sqlite3 import pool
+from ..db.backends.sqlite3.base import DatabaseWrapper
+from ..db.routers import ReadWriteRouter
+from ..management.commands.replicate_sqlite import replicate
+from ..middleware import PrimaryPinMiddleware
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        self.writer = self.wrapper('writer', {})
+        with self.writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+
+    def wrapper(self, alias, options):
+        settings_dict = dict(connections.databases[DEFAULT_DB_ALIAS],
+                             NAME=self.path, OPTIONS=options)
+        wrapper = DatabaseWrapper(settings_dict, alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Соединение открывается в WAL с настроенными pragma."""
+        self.assertEqual(self.pragma(self.writer, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(self.writer, 'busy_timeout'), 5000)
+        custom = self.wrapper('custom', {'pragmas': {'busy_timeout': 100}})
+        self.assertEqual(self.pragma(custom, 'busy_timeout'), 100)
+
+    def test_read_only_alias(self):
+        """Псевдоним только для чтения не может писать."""
+        reader = self.wrapper('reader', {'read_only': True})
+        with reader.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            with self.assertRaises(OperationalError):
+                cursor.execute('INSERT INTO item VALUES (1)')
+
+    def test_transaction_takes_write_lock_immediately(self):
+        """Транзакция сразу берёт блокировку записи."""
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with self.writer.cursor():
+            pass
+        self.writer.set_autocommit(True)
+        self.writer._start_transaction_under_autocommit()
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute('BEGIN IMMEDIATE')
+        finally:
+            self.writer.connection.execute('ROLLBACK')
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        self.addCleanup(self.clear_pool)
+
+    def clear_pool(self):
+        removed = pool._pools.pop('pooled', None)
+        if removed is not None:
+            removed.clear()
+
+    def wrapper(self, **options):
+        settings_dict = dict(connections.databases[DEFAULT_DB_ALIAS],
+                             NAME=self.path, OPTIONS={'pool': options})
+        wrapper = DatabaseWrapper(settings_dict, 'pooled')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_connection_reused(self):
+        """Закрытое соединение возвращается в пул и выдаётся снова."""
+        first = self.wrapper()
+        raw = first.connection
+        first.close()
+        second = self.wrapper()
+        self.assertIs(second.connection, raw)
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_broken_connection_discarded(self):
+        """Соединение, не прошедшее проверку, заменяется новым."""
+        first = self.wrapper()
+        raw = first.connection
+        first.close()
+        raw.close()
+        second = self.wrapper()
+        self.assertIsNot(second.connection, raw)
+        self.assertEqual(pool.pool_stats()['pooled']['discarded'], 1)
+
+    def test_idle_timeout_and_max_size(self):
+        """Лишние и простоявшие соединения закрываются."""
+        first = self.wrapper(max_size=1, idle_timeout=60)
+        second = self.wrapper(max_size=1, idle_timeout=60)
+        first.close()
+        second.close()
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual((stats['idle'], stats['overflow']), (1, 1))
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 61):
+            self.wrapper(max_size=1, idle_timeout=60)
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual((stats['discarded'], stats['created']), (1, 3))
+
+    def test_transaction_rolled_back_on_checkin(self):
+        """Незавершённая транзакция откатывается при возврате."""
+        wrapper = self.wrapper()
+        wrapper.connection.execute('CREATE TABLE item (id INTEGER)')
+        wrapper.connection.execute('BEGIN')
+        wrapper.connection.execute('INSERT INTO item VALUES (1)')
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertFalse(raw.in_transaction)
+        self.assertEqual(
+            raw.execute('SELECT COUNT(*) FROM item').fetchone(), (0,))
+
+
+@override_settings(READ_DATABASES=['replica'])
+class ReadWriteRouterTest(SimpleTestCase):
+    router = ReadWriteRouter()
+
+    def setUp(self):
+        patcher = mock.patch.dict(
+            connections.databases,
+            replica=connections.databases[DEFAULT_DB_ALIAS])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        routers.start_request()
+        self.addCleanup(routers.finish_request)
+
+    def test_routes_reads_to_replicas(self):
+        """Чтения постов идут в реплику, запись и миграции — в default."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_read(Session), DEFAULT_DB_ALIAS)
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def test_reads_after_write_stay_on_primary(self):
+        """После записи чтения запроса идут в default."""
+        self.assertEqual(self.router.db_for_write(Post), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        self.assertTrue(routers.finish_request())
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    @override_settings(READ_DATABASES=['missing'])
+    def test_falls_back_to_default(self):
+        """Без настроенных реплик всё идёт в default."""
+        self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """Страницы через псевдонимы реплик из настроек — зеркала default."""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        Post.objects.create(author=self.author, text='replica post')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def get(self, url):
+        with ExitStack() as stack:
+            replicas = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in settings.READ_DATABASES]
+            response = self.client.get(url)
+        return response, sum(len(replica) for replica in replicas)
+
+    def test_reads_pinned_to_primary_after_write(self):
+        """Ленты читают реплику, а после записи — основную базу."""
+        response, replica_queries = self.get(reverse('posts:index'))
+        self.assertContains(response, 'replica post')
+        self.assertGreater(replica_queries, 0)
+        self.assertNotIn(settings.PRIMARY_PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'fresh post'})
+        self.assertIn(settings.PRIMARY_PIN_COOKIE, response.cookies)
+        response, replica_queries = self.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertContains(response, 'fresh post')
+        self.assertEqual(replica_queries, 0)
+
+
+class PrimaryPinMiddlewareTest(SimpleTestCase):
+    def run_middleware(self, cookies, write):
+        def view(request):
+            self.read_alias = ReadWriteRouter().db_for_read(Post)
+            if write:
+                ReadWriteRouter().db_for_write(Post)
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return PrimaryPinMiddleware(view)(request)
+
+    @override_settings(READ_DATABASES=['replica'])
+    def test_pin_cookie(self):
+        """Запись ставит куку, с которой чтения идут в default."""
+        with mock.patch.dict(
+                connections.databases,
+                replica=connections.databases[DEFAULT_DB_ALIAS]):
+            response = self.run_middleware({}, write=True)
+            self.assertEqual(self.read_alias, 'replica')
+            cookie = response.cookies[settings.PRIMARY_PIN_COOKIE]
+            self.assertEqual(cookie['max-age'], settings.PRIMARY_PIN_SECONDS)
+            response = self.run_middleware(
+                {settings.PRIMARY_PIN_COOKIE: '1'}, write=False)
+            self.assertEqual(self.read_alias, DEFAULT_DB_ALIAS)
+            self.assertNotIn(settings.PRIMARY_PIN_COOKIE, response.cookies)
+
+
+class ReplicateTest(SimpleTestCase):
+    def test_replicate(self):
+        """replicate копирует состояние основной базы в реплику."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        source = os.path.join(directory, 'primary.sqlite3')
+        target = os.path.join(directory, 'replica.sqlite3')
+        with sqlite3.connect(source) as primary:
+            primary.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            primary.execute('INSERT INTO item VALUES (1)')
+        primary.close()
+        replicate(source, target)
+        replica = sqlite3.connect(target)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT id FROM item').fetchall(), [(1,)])
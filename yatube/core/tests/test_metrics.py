@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import registry
+
+User = get_user_model()
+
+
+class ViewMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff',
+                                             is_staff=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        registry.reset()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_metrics_aggregated_by_view_name(self):
+        """Метрики копятся по имени представления."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('about:author'))
+        views = registry.snapshot()['views']
+        self.assertEqual(views['posts:index']['count'], 1)
+        self.assertEqual(views['about:author']['count'], 1)
+        self.assertGreater(views['posts:index']['queries_max'], 0)
+
+    @override_settings(VIEW_QUERY_BUDGETS={'posts:index': 0})
+    def test_query_budget_warning(self):
+        """Превышение бюджета запросов попадает в лог."""
+        with self.assertLogs('core.middleware', level='WARNING'):
+            self.guest_client.get(reverse('posts:index'))
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """Метрики доступны только сотрудникам."""
+        url = reverse('view_metrics')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('views', response.json())
+        self.assertIn('pools', response.json())
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templates import compile_templates, template_names
+
+
+class TemplatePreloadTest(SimpleTestCase):
+    def test_all_templates_compile(self):
+        """Все шаблоны проекта компилируются, включая вложенные."""
+        names = template_names(engines['django'].engine)
+        for name in ('base.html', 'posts/post.html',
+                     'posts/includes/paginator.html'):
+            self.assertIn(name, names)
+        compiled, errors = compile_templates()
+        self.assertEqual(errors, [])
+        self.assertEqual(compiled, len(names))
+
+    def test_check_templates_fails_on_broken_template(self):
+        """check_templates падает на некомпилируемом шаблоне."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with open(os.path.join(directory, 'broken.html'), 'w') as template:
+            template.write('{% if %}')
+        config = dict(settings.TEMPLATES[0], DIRS=[directory])
+        stderr = StringIO()
+        with override_settings(TEMPLATES=[config]):
+            with self.assertRaises(CommandError):
+                call_command('check_templates', stdout=StringIO(),
+                             stderr=stderr)
+        self.assertIn('broken.html', stderr.getvalue())
@@ -1,5 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .db.backends.sqlite3.pool import pool_stats
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +20,9 @@ def server_error(requests):
 
 def permission_denied(requests, exception):
     return render(requests, 'core/403.html', status=403)
+
+
+@staff_member_required
+def view_metrics(request):
+    return JsonResponse({**registry.snapshot(), 'pools': pool_stats()},
+                        json_dumps_params={'ensure_ascii': False})
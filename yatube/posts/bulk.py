@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .models import Post
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключить auto_now_add, чтобы задать даты самим."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_create_posts(posts, batch_size):
+    """Создать посты пачкой, сохранив их pub_date, и вернуть их с pk.
+
+    Бэкенды без RETURNING (SQLite) не заполняют pk в bulk_create,
+    поэтому новые строки перечитываются по возрастанию id. Вызывать
+    внутри транзакции, чтобы не захватить чужие посты.
+    """
+    posts = list(posts)
+    last_id = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    with explicit_dates(Post._meta.get_field('pub_date')):
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+    if connection.features.can_return_ids_from_bulk_insert:
+        return posts
+    return list(Post.objects.filter(pk__gt=last_id).order_by('pk'))
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_cache_key, has_vary_header, learn_cache_key
+from django.utils.http import quote_etag
+
+from core.metrics import registry
+
+from .models import Post
+
+FEED_GENERATION_KEY = 'feed_generation'
+
+
+def new_version():
+    # Счётчик мог быть вытеснен из кеша: начинаем с текущего времени,
+    # чтобы не вернуться к версии, под которой уже лежат данные.
+    return int(time.time() * 1000)
+
+
+def version_key(kind, pk):
+    return f'{kind}_version:{pk}'
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, new_version(), None)
+
+
+def get_feed_generation():
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        cache.add(FEED_GENERATION_KEY, new_version(), None)
+        generation = cache.get(FEED_GENERATION_KEY)
+    return generation
+
+
+def bump_feed_generation():
+    bump_version(FEED_GENERATION_KEY)
+
+
+def _request_tag(request):
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode())
+    return f'{request.user.pk or 0}.{query.hexdigest()[:12]}'
+
+
+def feed_etag(request, *args, **kwargs):
+    """ETag страницы ленты без обращения к базе и шаблонам."""
+    return _feed_etag(request, get_feed_generation())
+
+
+def _feed_etag(request, generation):
+    return f'{generation}.{_request_tag(request)}'
+
+
+def post_etag(request, post_id):
+    """ETag страницы поста: поколение ленты и число комментариев."""
+    comments_count = Post.objects.filter(pk=post_id).values_list(
+        'comments_count', flat=True).first()
+    if comments_count is None:
+        return None
+    return f'{get_feed_generation()}.{comments_count}.{_request_tag(request)}'
+
+
+def _lock_key(key_prefix, request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'feed_cache_lock.{key_prefix}.{url}'
+
+
+def _is_cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and 'private' not in response.get('Cache-Control', '')
+        and not (not request.COOKIES and response.cookies
+                 and has_vary_header(response, 'Cookie'))
+    )
+
+
+def _should_recompute(entry, generation, now, beta):
+    """Решить, пора ли пересчитать запись (алгоритм XFetch).
+
+    Чем ближе срок годности и чем дольше строилась страница, тем выше
+    вероятность, что пересчёт начнётся заранее, пока запись свежая.
+    """
+    if entry['generation'] != generation:
+        return True
+    early = -entry['delta'] * beta * math.log(1 - random.random())
+    return now + early >= entry['expires']
+
+
+def _wait_for_entry(request, prefix):
+    """Подождать копию страницы, которую строит другой запрос."""
+    deadline = time.time() + settings.FEED_CACHE_LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        key = get_cache_key(request, prefix, 'GET', cache=cache)
+        entry = cache.get(key) if key else None
+        if entry is not None:
+            return entry
+    return None
+
+
+def _store_entry(request, response, prefix, timeout, generation, start):
+    delta = time.time() - start
+    stored_timeout = timeout + settings.FEED_CACHE_STALE_TIMEOUT
+    key = learn_cache_key(request, response, stored_timeout, prefix,
+                          cache=cache)
+    cache.set(key, {
+        'response': response,
+        'generation': generation,
+        'expires': start + delta + timeout,
+        'delta': delta,
+    }, stored_timeout)
+
+
+def _served(request, response, generation):
+    """Пометить ответ ETag поколения, под которым он построен.
+
+    Иначе condition() проставит устаревшей копии текущий ETag,
+    и клиент будет получать 304 на старую страницу.
+    """
+    response['ETag'] = quote_etag(_feed_etag(request, generation))
+    return response
+
+
+def cache_feed(timeout, key_prefix):
+    """Кеш страниц ленты, устойчивый к наплыву одинаковых запросов.
+
+    Страницу одновременно перестраивает только один запрос, взявший
+    блокировку. Остальные получают устаревшую копию, если она есть,
+    или ждут, пока копия появится. Копия считается устаревшей по
+    истечении timeout или при смене поколения ленты. ETag ответа
+    соответствует поколению, с которым построена отданная копия.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            # Шапка страницы зависит от пользователя, а SessionMiddleware
+            # добавляет Vary: Cookie уже после декоратора.
+            prefix = f'{key_prefix}.{request.user.pk or "anonymous"}'
+            generation = get_feed_generation()
+            key = get_cache_key(request, prefix, 'GET', cache=cache)
+            entry = cache.get(key) if key else None
+            now = time.time()
+            if entry is not None and not _should_recompute(
+                    entry, generation, now, settings.FEED_CACHE_BETA):
+                registry.increment(f'{key_prefix}.hit')
+                return _served(request, entry['response'], entry['generation'])
+
+            lock_key = _lock_key(prefix, request)
+            locked = cache.add(lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT)
+            if not locked and entry is not None:
+                registry.increment(f'{key_prefix}.stale')
+                return _served(request, entry['response'], entry['generation'])
+            if not locked:
+                registry.increment(f'{key_prefix}.lock_wait')
+                entry = _wait_for_entry(request, prefix)
+                if entry is not None:
+                    registry.increment(f'{key_prefix}.hit')
+                    return _served(request, entry['response'],
+                                   entry['generation'])
+
+            registry.increment(f'{key_prefix}.miss')
+            try:
+                start = time.time()
+                response = view_func(request, *args, **kwargs)
+                if _is_cacheable(request, response):
+                    _store_entry(request, response, prefix, timeout,
+                                 generation, start)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return _served(request, response, generation)
+        return wrapper
+    return decorator
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .cache import new_version, version_key
+
+
+def _card_key(post, in_group):
+    return f'post_card:{post.pk}:{int(in_group)}'
+
+
+def _post_version_keys(post):
+    keys = [version_key('post', post.pk), version_key('user', post.author_id)]
+    if post.group_id is not None:
+        keys.append(version_key('group', post.group_id))
+    return keys
+
+
+def _add_missing_versions(found, keys):
+    """Завести недостающие версии и дочитать их в found.
+
+    Только через add: set перезаписал бы версию, которую только что
+    добавил параллельный bump_version.
+    """
+    missing = {key for key in keys if key not in found}
+    for key in missing:
+        cache.add(key, new_version(), None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return missing
+
+
+def _drop_stale_cards(new_cards, version_keys, missing):
+    """Убрать карточки, чья заведённая версия сменилась при отрисовке."""
+    current = cache.get_many(missing)
+    for pk, (versions, _) in list(new_cards.items()):
+        for key, version in zip(version_keys[pk], versions):
+            if key in missing and current.get(key) != version:
+                del new_cards[pk]
+                break
+
+
+def render_post_cards(posts, in_group=False):
+    """HTML карточек постов из кеша фрагментов.
+
+    Версии поста, автора и группы и сами карточки читаются одним
+    cache.get_many; карточка, сохранённая под другими версиями,
+    отрисовывается заново.
+    """
+    posts = list(posts)
+    version_keys = {post.pk: _post_version_keys(post) for post in posts}
+    card_keys = {post.pk: _card_key(post, in_group) for post in posts}
+    found = cache.get_many(
+        [key for keys in version_keys.values() for key in keys]
+        + list(card_keys.values()))
+    missing = _add_missing_versions(
+        found, [key for keys in version_keys.values() for key in keys])
+
+    new_cards = {}
+    cards = []
+    for post in posts:
+        versions = tuple(found.get(key) for key in version_keys[post.pk])
+        cached = found.get(card_keys[post.pk])
+        if cached is not None and cached[0] == versions:
+            cards.append(cached[1])
+            continue
+        html = render_to_string('posts/post.html',
+                                {'post': post, 'group': in_group})
+        if None not in versions:
+            new_cards[post.pk] = (versions, html)
+        cards.append(html)
+    if missing and new_cards:
+        _drop_stale_cards(new_cards, version_keys, missing)
+    if new_cards:
+        cache.set_many({card_keys[pk]: card for pk, card in new_cards.items()},
+                       settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+def _shift(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def shift_user(user_id, **deltas):
+    # Отсутствующая строка счётчиков будет пересчитана при чтении
+    # в get_user_counters.
+    _shift(UserCounters.objects.filter(user_id=user_id), **deltas)
+
+
+def shift_group(group_id, delta):
+    if group_id is not None:
+        _shift(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def shift_post(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def get_user_counters(user):
+    counters = UserCounters.objects.filter(user=user).first()
+    if counters is None:
+        recount_users(User.objects.filter(pk=user.pk))
+        counters = UserCounters.objects.get(user=user)
+    return counters
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def recount_users(users=None):
+    users = User.objects.all() if users is None else users
+    with transaction.atomic():
+        UserCounters.objects.bulk_create(
+            (UserCounters(user_id=pk) for pk in users.filter(
+                counters__isnull=True).values_list('pk', flat=True)),
+            ignore_conflicts=True,
+        )
+        UserCounters.objects.filter(user__in=users).update(
+            posts_count=_count(Post, 'author'),
+            followers_count=_count(Follow, 'author'),
+            following_count=_count(Follow, 'user'),
+        )
+
+
+def recount_groups():
+    Group.objects.update(posts_count=_count(Post, 'group'))
+
+
+def recount_posts():
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+
+
+def recount_all():
+    recount_users()
+    recount_groups()
+    recount_posts()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+
+from .counters import get_user_counters
+from .models import Comment, Post, UserCounters
+from .paginators import CursorPaginator
+
+
+def load_post_detail(post_id, comments_after=None):
+    """Данные страницы поста за фиксированное число запросов.
+
+    Первый запрос получает пост вместе с автором, его счётчиками
+    и группой, второй — страницу комментариев с их авторами.
+    """
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'author__counters', 'group'),
+        pk=post_id,
+    )
+    try:
+        counters = post.author.counters
+    except UserCounters.DoesNotExist:
+        counters = get_user_counters(post.author)
+    return {
+        'post': post,
+        'counters': counters,
+        'comments': load_comments(post.pk, comments_after),
+    }
+
+
+def load_comments(post_id, after=None):
+    """Страница комментариев поста с авторами, следующая за курсором."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COMMENTS_ON_PAGE,
+        ordering=('created', 'id'),
+    )
+    return paginator.get_cursor_page(after)
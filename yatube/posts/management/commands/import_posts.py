@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, timeline
+from posts.bulk import bulk_create_posts
+from posts.cache import bump_feed_generation
+from posts.models import Group, Post, User
+from posts.thumbnails import queue_thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из NDJSON: по объекту на строку с полями '
+            'author, text и необязательными pub_date, group, image. '
+            'Посты создаются пачками, счётчики, ленты и кеш обновляются '
+            'один раз на пачку.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON; «-» — stdin')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоков для копирования картинок')
+        parser.add_argument('--media-root', default='',
+                            help='Каталог, от которого отсчитаны пути '
+                                 'картинок в файле')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Создавать отсутствующих авторов')
+        parser.add_argument('--create-groups', action='store_true',
+                            help='Создавать отсутствующие группы')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.authors = {}
+        self.groups = {}
+        self.created = 0
+        self.skipped = 0
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        source = (sys.stdin if options['path'] == '-'
+                  else open(options['path'], encoding='utf-8'))
+        with source, ThreadPoolExecutor(options['workers']) as executor:
+            for batch in self._batches(source):
+                self._import(batch, executor)
+                self.stdout.write(f'Импортировано постов: {self.created}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: создано {self.created}, пропущено {self.skipped}'))
+
+    def _skip(self, line_number, reason):
+        self.skipped += 1
+        self.stderr.write(f'Строка {line_number}: {reason}')
+
+    def _batches(self, lines):
+        batch = []
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self._skip(line_number, 'некорректный JSON')
+                continue
+            if (not isinstance(record, dict)
+                    or record.get('type', 'post') != 'post'):
+                continue
+            if not record.get('author') or not record.get('text'):
+                self._skip(line_number, 'нет author или text')
+                continue
+            batch.append((line_number, record))
+            if len(batch) == self.options['batch_size']:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _resolve(self, cache, names, queryset, field, create):
+        """Дополнить словарь имя → pk недостающими объектами."""
+        missing = set(names) - cache.keys()
+        if not missing:
+            return
+        found = dict(queryset.filter(**{f'{field}__in': missing})
+                     .values_list(field, 'pk'))
+        absent = missing - found.keys()
+        if absent and create:
+            queryset.model.objects.bulk_create(
+                (create(name) for name in absent), ignore_conflicts=True)
+            found.update(queryset.filter(**{f'{field}__in': absent})
+                         .values_list(field, 'pk'))
+        cache.update(found)
+        cache.update((name, None) for name in missing - found.keys())
+
+    def _copy_image(self, name):
+        path = os.path.join(self.options['media_root'], name)
+        try:
+            with open(path, 'rb') as image:
+                return default_storage.save(
+                    f'posts/{os.path.basename(name)}', File(image))
+        except OSError as error:
+            self.stderr.write(f'Картинка {name} не скопирована: {error}')
+            return ''
+
+    def _import(self, batch, executor):
+        password = make_password(None)
+        self._resolve(
+            self.authors, (record['author'] for _, record in batch),
+            User.objects.all(), 'username',
+            self.options['create_users'] and (
+                lambda name: User(username=name, password=password)))
+        self._resolve(
+            self.groups, (record['group'] for _, record in batch
+                          if record.get('group')),
+            Group.objects.all(), 'slug',
+            self.options['create_groups'] and (
+                lambda slug: Group(title=slug, slug=slug, description='')))
+        names = {record['image'] for _, record in batch
+                 if record.get('image')}
+        images = dict(zip(names, executor.map(self._copy_image, names)))
+
+        posts = []
+        for line_number, record in batch:
+            post = self._build(line_number, record, images)
+            if post is not None:
+                posts.append(post)
+        if not posts:
+            return
+        with transaction.atomic():
+            posts = bulk_create_posts(posts, self.options['batch_size'])
+            timeline.fan_out_many(posts)
+            for author_id, count in Counter(
+                    post.author_id for post in posts).items():
+                counters.shift_user(author_id, posts_count=count)
+            for group_id, count in Counter(
+                    post.group_id for post in posts).items():
+                counters.shift_group(group_id, count)
+        bump_feed_generation()
+        queued = set()
+        for post in posts:
+            if post.image and post.image.name not in queued:
+                queued.add(post.image.name)
+                queue_thumbnails(post)
+        self.created += len(posts)
+
+    def _build(self, line_number, record, images):
+        author_id = self.authors.get(record['author'])
+        if author_id is None:
+            self._skip(line_number, f'автор {record["author"]} не найден')
+            return None
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                self._skip(line_number, f'группа {record["group"]} не найдена')
+                return None
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            try:
+                pub_date = parse_datetime(str(record['pub_date']))
+            except ValueError:
+                pub_date = None
+            if pub_date is None:
+                self._skip(line_number, 'некорректная pub_date')
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(author_id=author_id, group_id=group_id,
+                    text=record['text'], pub_date=pub_date,
+                    image=images.get(record.get('image'), ''))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт полнотекстовый индекс FTS5 по текстам постов.'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('Полнотекстовый индекс доступен только '
+                               'для SQLite')
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс поиска пересоздан'))
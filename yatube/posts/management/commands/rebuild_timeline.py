@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Timeline, User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Имя пользователя')
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options['user']:
+            try:
+                user_id = User.objects.get(username=options['user']).pk
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден')
+        with transaction.atomic():
+            timeline.rebuild(user_id)
+        entries = Timeline.objects.all()
+        if user_id is not None:
+            entries = entries.filter(user_id=user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {entries.count()}'))
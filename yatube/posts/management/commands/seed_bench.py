@@ -0,0 +1,172 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import counters, search, timeline
+from posts.bulk import bulk_create_posts, explicit_dates
+from posts.cache import bump_feed_generation
+from posts.models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+# Показатель степенного закона: у немногих авторов большинство
+# подписчиков, как в настоящих социальных графах.
+POPULARITY_EXPONENT = 1.2
+
+
+def popularity_weights(count):
+    """Накопленные веса для random.choices по закону Ципфа."""
+    return list(accumulate(1 / rank ** POPULARITY_EXPONENT
+                           for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными для нагрузочных '
+            'замеров: пользователи, посты с картинками, подписки '
+            'со степенным распределением и комментарии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--images', type=int, default=20,
+                            help='Сколько разных картинок создать')
+        parser.add_argument('--image-share', type=float, default=0.3,
+                            help='Доля постов с картинкой')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить посты')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя')
+        self.random = random.Random(options['seed'])
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(options['seed'])
+        self.sentences = [self.faker.sentence(nb_words=12)
+                          for _ in range(500)]
+        with transaction.atomic():
+            users = self._users(options['users'])
+            groups = self._groups(options['groups'])
+            images = self._images(options['images'])
+            posts = self._posts(options, users, groups, images)
+            follows = self._follows(options['follows'], users)
+            comments = self._comments(options['comments'], users, posts)
+        self.stdout.write('Пересчёт счётчиков, лент и поискового индекса')
+        counters.recount_all()
+        timeline.rebuild()
+        search.rebuild()
+        bump_feed_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, постов {len(posts)}, '
+            f'подписок {follows}, комментариев {comments}'))
+
+    def _text(self, sentences=3):
+        return ' '.join(self.random.choices(self.sentences, k=sentences))
+
+    def _users(self, count):
+        start = User.objects.count()
+        password = make_password(None)
+        usernames = [f'bench{start + number}' for number in range(count)]
+        User.objects.bulk_create(
+            (User(username=username, password=password,
+                  first_name=self.faker.first_name(),
+                  last_name=self.faker.last_name())
+             for username in usernames),
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        users = list(User.objects.filter(username__in=usernames)
+                     .values_list('pk', flat=True))
+        # Популярность автора не должна зависеть от порядка создания.
+        self.random.shuffle(users)
+        return users
+
+    def _groups(self, count):
+        start = Group.objects.count()
+        slugs = [f'bench-{start + number}' for number in range(count)]
+        Group.objects.bulk_create(
+            (Group(title=self.faker.catch_phrase()[:200], slug=slug,
+                   description=self._text(2))
+             for slug in slugs),
+            ignore_conflicts=True)
+        return list(Group.objects.filter(slug__in=slugs)
+                    .values_list('pk', flat=True))
+
+    def _images(self, count):
+        names = []
+        for number in range(count):
+            image = Image.new('RGB', (1200, 800))
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            image.paste(color, (0, 0, 1200, 400))
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=80)
+            names.append(default_storage.save(
+                f'posts/bench_{number}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def _posts(self, options, users, groups, images):
+        weights = popularity_weights(len(users))
+        now = timezone.now()
+        seconds = options['days'] * 24 * 60 * 60
+        posts = (
+            Post(
+                author_id=author_id,
+                text=self._text(self.random.randint(1, 8)),
+                group_id=(self.random.choice(groups)
+                          if groups and self.random.random() < 0.5 else None),
+                image=(self.random.choice(images) if images
+                       and self.random.random() < options['image_share']
+                       else ''),
+                pub_date=now - timedelta(
+                    seconds=self.random.randrange(seconds)),
+            )
+            for author_id in self.random.choices(
+                users, cum_weights=weights, k=options['posts'])
+        )
+        return [(post.pk, post.pub_date)
+                for post in bulk_create_posts(posts, BATCH_SIZE)]
+
+    def _follows(self, count, users):
+        weights = popularity_weights(len(users))
+        pairs = set()
+        attempts = 0
+        while len(pairs) < count and attempts < count * 10:
+            attempts += 1
+            user_id = self.random.choice(users)
+            [author_id] = self.random.choices(users, cum_weights=weights)
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in pairs),
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(pairs)
+
+    def _comments(self, count, users, posts):
+        if not posts:
+            return 0
+        weights = popularity_weights(len(posts))
+        now = timezone.now()
+        comments = []
+        commented = self.random.choices(posts, cum_weights=weights, k=count)
+        for post_id, pub_date in commented:
+            created = pub_date + (now - pub_date) * self.random.random()
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.random.choice(users),
+                text=self._text(1),
+                created=created,
+            ))
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        return count
@@ -0,0 +1,54 @@
+import os
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails, thumbnails_ready
+
+
+def _warm(image_name):
+    return image_name, generate_thumbnails(image_name)
+
+
+class Command(BaseCommand):
+    help = ('Заранее создаёт миниатюры картинок постов. '
+            'Уже готовые миниатюры пропускаются, поэтому команду '
+            'можно прервать и запустить снова.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число рабочих процессов')
+        parser.add_argument('--chunk-size', type=int, default=8,
+                            help='Сколько картинок отдавать процессу за раз')
+
+    def handle(self, *args, **options):
+        images = (Post.objects.exclude(image='').order_by()
+                  .values_list('image', flat=True).distinct())
+        pending = [name for name in images.iterator()
+                   if not thumbnails_ready(name)]
+        total = len(pending)
+        self.stdout.write(f'Картинок без миниатюр: {total}')
+        if not total:
+            return
+        failed = 0
+        for done, (image_name, ok) in enumerate(
+                self._run(pending, options), start=1):
+            if not ok:
+                failed += 1
+                self.stderr.write(f'Ошибка: {image_name}')
+            self.stdout.write(f'[{done}/{total}] {image_name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {total - failed}, ошибок: {failed}'))
+
+    def _run(self, pending, options):
+        workers = max(options['workers'] or 1, 1)
+        if workers == 1:
+            yield from map(_warm, pending)
+            return
+        # Дочерние процессы не должны использовать соединения родителя.
+        connections.close_all()
+        with Pool(workers, initializer=connections.close_all) as pool:
+            yield from pool.imap_unordered(
+                _warm, pending, chunksize=options['chunk_size'])
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts import search
+
+
+def install_search(apps, schema_editor):
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class CursorPaginator(Paginator):
+    """Paginator с поддержкой курсорной (keyset) навигации.
+
+    Помимо обычных страниц по номеру умеет отдавать страницу,
+    следующую за непрозрачным токеном ``after``. Такая страница
+    не требует ``COUNT(*)`` и ``OFFSET``, поэтому её стоимость
+    не зависит от глубины.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 **kwargs):
+        self.ordering = ordering
+        super().__init__(object_list.order_by(*ordering), per_page, **kwargs)
+
+    def _fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    @staticmethod
+    def _encode(values):
+        raw = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def _decode(token):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            values = json.loads(raw.decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        return values if isinstance(values, list) else None
+
+    def encode_cursor(self, obj):
+        opts = self.object_list.model._meta
+        return self._encode([opts.get_field(field).value_to_string(obj)
+                             for field in self._fields()])
+
+    def decode_cursor(self, token):
+        values = self._decode(token)
+        fields = self._fields()
+        if values is None or len(values) != len(fields):
+            return None
+        opts = self.object_list.model._meta
+        try:
+            return [opts.get_field(field).to_python(value)
+                    for field, value in zip(fields, values)]
+        except ValidationError:
+            return None
+
+    def _after_filter(self, values):
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def get_page_window(self, number, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг ``number`` с пропусками ``ELLIPSIS``.
+
+        Длина результата не зависит от общего числа страниц.
+        """
+        num_pages = self.num_pages
+        window = range(max(number - on_each_side, 1),
+                       min(number + on_each_side, num_pages) + 1)
+        head = range(1, min(on_ends, num_pages) + 1)
+        tail = range(max(num_pages - on_ends + 1, 1), num_pages + 1)
+        result = []
+        for part in (head, window, tail):
+            for page_number in part:
+                if result and page_number <= result[-1]:
+                    continue
+                if result and page_number > result[-1] + 1:
+                    result.append(self.ELLIPSIS)
+                result.append(page_number)
+        return result
+
+    def get_cursor_page(self, token):
+        """Вернуть страницу, следующую за курсором ``token``.
+
+        Некорректный токен трактуется как начало ленты.
+        """
+        object_list = self.object_list
+        values = self.decode_cursor(token) if token else None
+        if values is not None:
+            object_list = object_list.filter(self._after_filter(values))
+        items = list(object_list[:self.per_page + 1])
+        return CursorPage(items[:self.per_page], self,
+                          has_next=len(items) > self.per_page,
+                          has_previous=values is not None)
+
+
+class CursorPage(Page):
+    """Страница курсорной навигации: без номера и общего числа страниц."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = (paginator.encode_cursor(object_list[-1])
+                            if has_next else None)
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: страницы постов по записям Timeline.
+
+    Сортировка и курсор идут по (pub_date, post_id) самой Timeline,
+    поэтому страница читается проходом по индексу
+    timeline_user_pub_date_idx без сортировки, а посты подтягиваются
+    JOIN через select_related('post').
+    """
+
+    def __init__(self, entries, per_page, ordering=('-pub_date', '-post_id'),
+                 **kwargs):
+        super().__init__(entries, per_page, ordering=ordering, **kwargs)
+
+    def _get_page(self, object_list, number, paginator):
+        entries = list(object_list)
+        page = super()._get_page([entry.post for entry in entries],
+                                 number, paginator)
+        page.next_cursor = self.encode_cursor(entries[-1]) if entries else None
+        return page
+
+    def get_cursor_page(self, token):
+        page = super().get_cursor_page(token)
+        page.object_list = [entry.post for entry in page.object_list]
+        return page
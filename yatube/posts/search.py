@@ -0,0 +1,133 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+from .paginators import CursorPage, CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def is_supported(using_connection=connection):
+    return using_connection.vendor == 'sqlite'
+
+
+def install(using_connection=connection):
+    """Создать индекс FTS5 и триггеры синхронизации с posts_post.
+
+    Вызывается повторно после миграций: пересоздание таблицы
+    posts_post в SQLite удаляет её триггеры.
+    """
+    if not is_supported(using_connection):
+        return
+    with using_connection.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def uninstall(using_connection=connection):
+    if not is_supported(using_connection):
+        return
+    with using_connection.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(using_connection=connection):
+    install(using_connection)
+    if not is_supported(using_connection):
+        return
+    with using_connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Превратить пользовательский ввод в безопасный запрос FTS5."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная навигация по результатам поиска, ранжированным bm25."""
+
+    def __init__(self, query, per_page):
+        self.query = query
+        super().__init__(Post.objects.select_related('author', 'group'),
+                         per_page, ordering=('-pub_date', '-id'))
+
+    def encode_cursor(self, obj):
+        if not hasattr(obj, 'search_rank'):
+            return super().encode_cursor(obj)
+        return self._encode([obj.search_rank, obj.pk])
+
+    def decode_cursor(self, token):
+        if not is_supported():
+            return super().decode_cursor(token)
+        values = self._decode(token)
+        if values is None or len(values) != 2:
+            return None
+        try:
+            return [float(values[0]), int(values[1])]
+        except (TypeError, ValueError):
+            return None
+
+    def get_cursor_page(self, token):
+        match = match_expression(self.query)
+        if not match:
+            return CursorPage([], self, has_next=False, has_previous=False)
+        if not is_supported():
+            self.object_list = self.object_list.filter(
+                text__icontains=self.query)
+            return super().get_cursor_page(token)
+        values = self.decode_cursor(token) if token else None
+        sql = (f'SELECT rowid, bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s')
+        params = [match]
+        if values is not None:
+            sql += (f' AND (bm25({FTS_TABLE}) > %s OR '
+                    f'(bm25({FTS_TABLE}) = %s AND rowid > %s))')
+            params += [values[0], values[0], values[1]]
+        sql += f' ORDER BY bm25({FTS_TABLE}), rowid LIMIT %s'
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ranked = cursor.fetchall()
+        posts = self.object_list.in_bulk(
+            [post_id for post_id, _ in ranked[:self.per_page]])
+        results = []
+        for post_id, rank in ranked[:self.per_page]:
+            if post_id in posts:
+                posts[post_id].search_rank = rank
+                results.append(posts[post_id])
+        return CursorPage(results, self,
+                          has_next=len(ranked) > self.per_page,
+                          has_previous=values is not None)
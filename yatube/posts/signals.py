@@ -0,0 +1,135 @@
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import counters, search, thumbnails, timeline
+from .cache import bump_feed_generation, bump_version, version_key
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    still_following = Follow.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id).exists()
+    if not still_following:
+        timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def feed_changed(sender, update_fields=None, **kwargs):
+    # Вход пользователя (update_last_login) на ленты не влияет.
+    if update_fields == {'last_login'}:
+        return
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_card_changed(sender, instance, **kwargs):
+    bump_version(version_key('post', instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_card_changed(sender, instance, **kwargs):
+    bump_version(version_key('group', instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_card_changed(sender, instance, **kwargs):
+    bump_version(version_key('user', instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_group_remember(sender, instance, **kwargs):
+    instance._saved_group_id = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('group_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_counters_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.shift_user(instance.author_id, posts_count=1)
+        counters.shift_group(instance.group_id, 1)
+    elif instance._saved_group_id != instance.group_id:
+        counters.shift_group(instance._saved_group_id, -1)
+        counters.shift_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_counters_deleted(sender, instance, **kwargs):
+    counters.shift_user(instance.author_id, posts_count=-1)
+    counters.shift_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.shift_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.shift_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_counters_created(sender, instance, created, **kwargs):
+    if created:
+        counters.shift_user(instance.author_id, followers_count=1)
+        counters.shift_user(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_counters_deleted(sender, instance, **kwargs):
+    counters.shift_user(instance.author_id, followers_count=-1)
+    counters.shift_user(instance.user_id, following_count=-1)
+
+
+@receiver(post_migrate)
+def search_index_install(sender, using, **kwargs):
+    connection = connections[using]
+    if (sender.name == 'posts'
+            and Post._meta.db_table in connection.introspection.table_names()):
+        search.install(connection)
+
+
+@receiver(request_started)
+def thumbnails_request_started(sender, **kwargs):
+    thumbnails.start_request()
+
+
+@receiver(request_finished)
+def thumbnails_request_finished(sender, **kwargs):
+    thumbnails.finish_request()
@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def next_cursor(page):
+    if not page.has_next():
+        return ''
+    cursor = getattr(page, 'next_cursor', None)
+    if cursor is not None:
+        return cursor
+    return page.paginator.encode_cursor(page[len(page) - 1])
+
+
+@register.filter
+def page_window(page):
+    return page.paginator.get_page_window(page.number)
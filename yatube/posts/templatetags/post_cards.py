@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cards import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    cards = render_post_cards(posts, in_group=bool(context.get('group')))
+    return [mark_safe(card) for card in cards]
@@ -0,0 +1,15 @@
+from django import template
+
+from ..thumbnails import get_ready_thumbnail
+
+register = template.Library()
+
+
+@register.filter
+def ready_thumbnail(image, alias):
+    if not image:
+        return ''
+    thumbnail = get_ready_thumbnail(image, alias)
+    if thumbnail is None:
+        return image.url
+    return thumbnail.url
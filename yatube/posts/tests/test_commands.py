@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..counters import get_user_counters
+from ..models import Follow, Group, Post, Timeline
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False)
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(title='group', slug='group',
+                                         description='description')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def import_posts(self, records, *args):
+        path = os.path.join(self.directory, 'posts.ndjson')
+        with open(path, 'w') as source:
+            for record in records:
+                source.write(record if isinstance(record, str)
+                             else json.dumps(record))
+                source.write('\n')
+        err = StringIO()
+        call_command('import_posts', path, '--batch-size=2',
+                     f'--media-root={self.directory}', *args,
+                     stdout=StringIO(), stderr=err)
+        return err.getvalue()
+
+    def test_import(self):
+        """Посты создаются пачками с датами, группами, лентами
+        и счётчиками."""
+        with open(os.path.join(self.directory, 'cat.gif'), 'wb') as image:
+            image.write(
+                b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                b'\x0A\x00\x3B'
+            )
+        errors = self.import_posts([
+            {'author': 'author', 'text': 'old',
+             'pub_date': '2020-01-01T10:00:00+00:00', 'group': 'group'},
+            {'author': 'author', 'text': 'with image', 'image': 'cat.gif'},
+            {'author': 'author', 'text': 'third'},
+            {'author': 'ghost', 'text': 'skipped'},
+            'not json',
+        ])
+        self.assertIn('ghost', errors)
+        self.assertIn('JSON', errors)
+        self.assertEqual(Post.objects.count(), 3)
+        old = Post.objects.get(text='old')
+        self.assertEqual(old.pub_date.year, 2020)
+        self.assertEqual(old.group, self.group)
+        self.assertEqual(Post.objects.get(text='with image').image.name,
+                         'posts/cat.gif')
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(),
+                         3)
+        self.assertEqual(get_user_counters(self.author).posts_count, 3)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_create_missing_authors_and_groups(self):
+        """Флаги --create-* создают недостающих авторов и группы."""
+        self.import_posts(
+            [{'author': 'newcomer', 'text': 'hello', 'group': 'fresh'}],
+            '--create-users', '--create-groups')
+        post = Post.objects.get(text='hello')
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertEqual(post.group.slug, 'fresh')
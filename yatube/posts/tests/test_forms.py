@@ -1,14 +1,21 @@
 import shutil
 import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..forms import PostForm
 from ..models import Comment, Follow, Group, Post
+from ..thumbnails import (_generate_in_background, generate_thumbnails,
+                          get_ready_thumbnail)
 
 User = get_user_model()
 
@@ -91,6 +98,152 @@ class CreateFormTests(TestCase):
             ).exists()
         )
 
+    @override_settings(THUMBNAIL_ASYNC=False)
+    def test_create_post_generates_thumbnails(self):
+        """При создании поста готовятся миниатюры картинки."""
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        uploaded_image = SimpleUploadedFile(
+            name='thumb.gif',
+            content=image,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'post with thumbnail', 'image': uploaded_image},
+        )
+        post = Post.objects.get(text='post with thumbnail')
+        thumbnail = get_ready_thumbnail(post.image, 'card')
+        self.assertIsNotNone(thumbnail)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, thumbnail.url)
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_thumbnails_queued_after_commit(self):
+        """Миниатюры ставятся в фоновую очередь после фиксации."""
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        with mock.patch('posts.thumbnails.transaction.on_commit') as commit, \
+                mock.patch('posts.thumbnails.get_executor') as get_executor:
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'queued post',
+                      'image': SimpleUploadedFile('queued.gif', image,
+                                                  'image/gif')},
+            )
+            post = Post.objects.get(text='queued post')
+            self.assertIsNone(get_ready_thumbnail(post.image, 'card'))
+            get_executor.assert_not_called()
+            commit.call_args[0][0]()
+        get_executor.return_value.submit.assert_called_once_with(
+            _generate_in_background, post.image.name)
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_request_waits_for_queued_thumbnails(self):
+        """Запрос завершается после миниатюр, поставленных им в очередь."""
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        generated = threading.Event()
+
+        def generate(image_name):
+            time.sleep(0.1)
+            generated.set()
+
+        with mock.patch('posts.thumbnails.transaction.on_commit',
+                        side_effect=lambda callback: callback()), \
+                mock.patch('posts.thumbnails._generate_in_background',
+                           side_effect=generate):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'waited post',
+                      'image': SimpleUploadedFile('waited.gif', image,
+                                                  'image/gif')},
+            )
+        self.assertTrue(generated.is_set())
+
+    def test_thumbnail_refreshes_cached_pages(self):
+        """Готовая миниатюра сбрасывает кеш страниц и их ETag."""
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        post = Post.objects.create(
+            author=self.user,
+            text='post before thumbnail',
+            image=SimpleUploadedFile('late.gif', image, 'image/gif'),
+        )
+        urls = (reverse('posts:index'),
+                reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        etags = {}
+        for url in urls:
+            response = self.authorized_client.get(url)
+            self.assertContains(response, post.image.url)
+            etags[url] = response['ETag']
+        generate_thumbnails(post.image.name)
+        thumbnail = get_ready_thumbnail(post.image, 'card')
+        for url in urls:
+            response = self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertContains(response, thumbnail.url)
+
+    def test_post_without_thumbnail_shows_original_image(self):
+        """Пока миниатюры нет, показывается исходная картинка."""
+        post = Post.objects.create(
+            author=self.user,
+            text='post without thumbnail',
+            image='posts/missing.gif'
+        )
+        self.assertIsNone(get_ready_thumbnail(post.image, 'card'))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, post.image.url)
+
+    def test_warm_thumbnails_command(self):
+        """warm_thumbnails создаёт недостающие миниатюры и пропускает
+        готовые."""
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        post = Post.objects.create(
+            author=self.user,
+            text='post to warm',
+            image=SimpleUploadedFile(name='warm.gif', content=image,
+                                     content_type='image/gif')
+        )
+        call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        self.assertIsNotNone(get_ready_thumbnail(post.image, 'card'))
+        out = StringIO()
+        call_command('warm_thumbnails', workers=1, stdout=out)
+        self.assertIn('Картинок без миниатюр: 0', out.getvalue())
+
     def test_edit_psot(self):
         """Валидная форма редактирования записи в Post."""
         Post.objects.create(
@@ -165,6 +318,23 @@ class CreateFormTests(TestCase):
             ).exists()
         )
 
+    def test_failed_counter_update_rolls_back_writes(self):
+        """Ошибка в счётчиках откатывает сохранённые пост и комментарий."""
+        requests = (
+            ('posts.counters.shift_post', reverse(
+                'posts:add_comment', kwargs={'post_id': self.post.pk}),
+             {'text': 'lost comment'}, Comment),
+            ('posts.counters.shift_user', reverse('posts:post_create'),
+             {'text': 'lost post'}, Post),
+        )
+        for target, url, data, model in requests:
+            with self.subTest(url=url):
+                count = model.objects.count()
+                with mock.patch(target, side_effect=RuntimeError):
+                    with self.assertRaises(RuntimeError):
+                        self.authorized_client.post(url, data)
+                self.assertEqual(model.objects.count(), count)
+
     def test_follow(self):
         """Валидная форма подписки на пользователя."""
         follow_count = Follow.objects.count()
@@ -1,7 +1,13 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, Timeline, UserCounters
+from ..paginators import TimelinePaginator
 
 User = get_user_model()
 
@@ -60,3 +66,162 @@ class ModelsTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.other_group = Group.objects.create(
+            title='other group',
+            slug='other_slug',
+            description='other_description',
+        )
+
+    def assertCounters(self, user, **expected):
+        counters = UserCounters.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(counters, field), value)
+
+    def test_post_and_comment_counters(self):
+        """Счётчики постов и комментариев следуют за изменениями."""
+        post = Post.objects.create(author=self.user, group=self.group,
+                                   text='test post')
+        Comment.objects.create(post=post, author=self.reader, text='comment')
+        self.assertCounters(self.user, posts_count=1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        post.delete()
+        self.assertCounters(self.user, posts_count=0)
+
+    def test_follow_counters(self):
+        """Счётчики подписок и подписчиков следуют за изменениями."""
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertCounters(self.user, followers_count=1, following_count=0)
+        self.assertCounters(self.reader, followers_count=0, following_count=1)
+        follow.delete()
+        self.assertCounters(self.user, followers_count=0)
+        self.assertCounters(self.reader, following_count=0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount исправляет расхождение счётчиков."""
+        Post.objects.create(author=self.user, group=self.group, text='post')
+        UserCounters.objects.filter(user=self.user).update(posts_count=42)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=42)
+        call_command('recount', stdout=StringIO())
+        self.assertCounters(self.user, posts_count=1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='test post')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('USE TEMP B-TREE', plan)
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент используют составные индексы без сортировки."""
+        feed_order = ('-pub_date', '-id')
+        queries = {
+            'post_pub_date_idx':
+                Post.objects.order_by(*feed_order)[:10],
+            'post_author_pub_date_idx':
+                Post.objects.filter(author=self.user).order_by(*feed_order),
+            'post_group_pub_date_idx':
+                Post.objects.filter(group=self.group).order_by(*feed_order),
+            'comment_post_created_idx':
+                Comment.objects.filter(post=self.post).order_by('created'),
+        }
+        for index_name, queryset in queries.items():
+            with self.subTest(index_name=index_name):
+                self.assertUsesIndex(queryset, index_name)
+
+    def test_follow_feed_uses_timeline_index(self):
+        """Лента подписок читает Timeline по индексу без сортировки."""
+        entries = Timeline.objects.filter(user=self.user).select_related(
+            'post__author', 'post__group')
+        paginator = TimelinePaginator(entries, 10)
+        cursor = paginator.decode_cursor(
+            paginator.encode_cursor(Timeline(pub_date=self.post.pub_date,
+                                             post_id=self.post.pk)))
+        pages = {
+            'first': paginator.object_list[:11],
+            'after': paginator.object_list.filter(
+                paginator._after_filter(cursor))[:11],
+        }
+        for name, queryset in pages.items():
+            with self.subTest(page=name):
+                self.assertUsesIndex(queryset, 'timeline_user_pub_date_idx')
+
+    def test_follow_is_unique(self):
+        """Подписаться на автора дважды нельзя."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(user=reader, author=self.user)
+
+
+class RemoveDuplicateFollowsMigrationTest(TransactionTestCase):
+    migrate_from = ('posts', '0019_post_search')
+    migrate_to = ('posts', '0020_feed_indexes')
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        call_command('migrate', 'posts', verbosity=0)
+
+    def test_counters_recounted(self):
+        """Удаление дубликатов подписок пересчитывает счётчики."""
+        apps = self.migrate(self.migrate_from)
+        HistoricalUser = apps.get_model('auth', 'User')
+        Follow = apps.get_model('posts', 'Follow')
+        UserCounters = apps.get_model('posts', 'UserCounters')
+        reader = HistoricalUser.objects.create(username='reader')
+        author = HistoricalUser.objects.create(username='author')
+        for _ in range(3):
+            Follow.objects.create(user=reader, author=author)
+        UserCounters.objects.create(user=reader, following_count=3)
+        UserCounters.objects.create(user=author, followers_count=3)
+
+        apps = self.migrate(self.migrate_to)
+        UserCounters = apps.get_model('posts', 'UserCounters')
+        self.assertEqual(UserCounters.objects.get(
+            user__username='reader').following_count, 1)
+        self.assertEqual(UserCounters.objects.get(
+            user__username='author').followers_count, 1)
@@ -1,16 +1,29 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.auth.models import AnonymousUser, update_last_login
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post
+from core.metrics import registry
+
+from ..cache import (_lock_key, bump_feed_generation, bump_version,
+                     cache_feed, version_key)
+from ..cards import render_post_cards
+from ..loaders import load_post_detail
+from ..models import Comment, Follow, Group, Post, Timeline
+from ..paginators import CursorPaginator
 
 User = get_user_model()
 
@@ -265,6 +278,16 @@ class PagesTests(TestCase):
         posts_cleared = response_cleared.content
         self.assertEqual(posts, posts_cleared)
 
+    def test_index_page_cache_invalidated_on_post_change(self):
+        """Кеш главной страницы сбрасывается при изменении постов"""
+        response = self.authorized_client.get(reverse('posts:index'))
+        post = Post.objects.create(author=self.user, text='fresh post')
+        response_fresh = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(response.content, response_fresh.content)
+        self.assertContains(response_fresh, post.text)
+        response_cached = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response_fresh.content, response_cached.content)
+
     def test_follow_page_show_current_context(self):
         """Шаблон follow_index сформирован с правильным контекстом."""
         Follow(
@@ -302,6 +325,7 @@ class PaginatorViewsTest(TestCase):
     def setUp(self):
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
+        cache.clear()
 
     def test_first_page_contains_ten_records(self):
         for url in self.test_urls:
@@ -314,3 +338,391 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(url=url):
                 response = self.authorized_client.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_cursor_page_continues_first_page(self):
+        """Курсорная страница продолжает ленту без пропусков и повторов."""
+        for url in self.test_urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                first_page = response.context['page_obj']
+                cursor = first_page.paginator.encode_cursor(first_page[9])
+                response = self.authorized_client.get(
+                    url, {'after': cursor})
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), 3)
+                self.assertFalse(page_obj.has_next())
+                self.assertTrue(set(first_page).isdisjoint(page_obj))
+
+    def test_follow_feed_pages(self):
+        """Лента подписок листается по номеру и курсору Timeline."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        first_page = client.get(url).context['page_obj']
+        self.assertEqual(len(first_page), 10)
+        self.assertIsInstance(first_page[0], Post)
+        self.assertEqual(
+            len(client.get(url, {'page': 2}).context['page_obj']), 3)
+        for cursor in (first_page.next_cursor,
+                       first_page.paginator.encode_cursor(
+                           Timeline.objects.get(user=reader,
+                                                post=first_page[9]))):
+            page_obj = client.get(url, {'after': cursor}).context['page_obj']
+            self.assertEqual(len(page_obj), 3)
+            self.assertFalse(page_obj.has_next())
+            self.assertTrue(set(first_page).isdisjoint(page_obj))
+
+    def test_page_window_is_bounded(self):
+        """Окно номеров страниц не зависит от числа страниц."""
+        paginator = CursorPaginator(Post.objects.all(), 1)
+        gap = paginator.ELLIPSIS
+        self.assertEqual(paginator.get_page_window(7),
+                         [1, gap, 5, 6, 7, 8, 9, gap, 13])
+        self.assertEqual(paginator.get_page_window(1),
+                         [1, 2, 3, gap, 13])
+        self.assertEqual(paginator.get_page_window(12),
+                         [1, gap, 10, 11, 12, 13])
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор открывает начало ленты."""
+        url = reverse('posts:index')
+        response = self.authorized_client.get(url, {'after': 'broken'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(author=cls.author, text='old')
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='new')
+        self.assertEqual(
+            set(Timeline.objects.filter(user=self.reader)
+                .values_list('post_id', flat=True)),
+            {self.old_post.pk, new_post.pk})
+        follow.delete()
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+
+    def test_rebuild_timeline_command(self):
+        """Команда rebuild_timeline восстанавливает ленту."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Timeline.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='searcher')
+        cls.both_post = Post.objects.create(
+            author=cls.user, text='Котики и собаки, собаки и котики')
+        cls.dogs_post = Post.objects.create(
+            author=cls.user, text='Только собаки')
+        cls.birds_post = Post.objects.create(
+            author=cls.user, text='Птицы')
+        cls.url = reverse('posts:search')
+
+    def test_search_finds_matching_posts(self):
+        """Поиск находит посты по словам текста."""
+        response = self.client.get(self.url, {'q': 'собаки'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(set(page_obj), {self.both_post, self.dogs_post})
+        response = self.client.get(self.url, {'q': 'котики "собаки'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.both_post])
+
+    @override_settings(POSTS_ON_PAGE=1)
+    def test_search_is_cursor_paginated(self):
+        """Результаты поиска листаются курсором без повторов."""
+        response = self.client.get(self.url, {'q': 'собаки'})
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.has_next())
+        response = self.client.get(
+            self.url, {'q': 'собаки', 'after': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(set(first_page) | set(second_page),
+                         {self.both_post, self.dogs_post})
+
+    def test_search_index_follows_post_changes(self):
+        """Индекс поиска обновляется при изменении и удалении постов."""
+        self.birds_post.text = 'Попугаи'
+        self.birds_post.save()
+        response = self.client.get(self.url, {'q': 'попугаи'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.birds_post])
+        self.birds_post.delete()
+        response = self.client.get(self.url, {'q': 'попугаи'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(self.url, {'q': 'птицы'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.birds_post])
+
+
+class PostDetailQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_group',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='test post')
+        for number in range(5):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text=f'comment {number}')
+
+    def test_loader_uses_fixed_number_of_queries(self):
+        """Данные страницы поста загружаются двумя запросами."""
+        with self.assertNumQueries(2):
+            context = load_post_detail(self.post.pk)
+            self.assertEqual(context['counters'].posts_count, 1)
+            self.assertEqual(context['post'].group, self.group)
+            usernames = [comment.author.username
+                         for comment in context['comments']]
+        self.assertEqual(len(usernames), 5)
+
+    def test_post_detail_query_count(self):
+        """Число запросов страницы поста не зависит от комментариев."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # Третий запрос вычисляет ETag.
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    @override_settings(COMMENTS_ON_PAGE=3)
+    def test_post_detail_comments_are_paginated(self):
+        """Комментарии на странице поста выводятся порциями."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        comments = self.client.get(url).context['comments']
+        self.assertEqual(len(comments), 3)
+        response = self.client.get(
+            url, {'comments_after': comments.next_cursor})
+        self.assertEqual(len(response.context['comments']), 2)
+
+    @override_settings(COMMENTS_ON_PAGE=3)
+    def test_comments_fragment(self):
+        """Фрагмент комментариев отдаёт следующие порции в HTML и JSON."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url, {'format': 'json'})
+        data = response.json()
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['comment 0', 'comment 1', 'comment 2'])
+        response = self.client.get(url, {'after': data['next']})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertContains(response, 'comment 4')
+        self.assertNotContains(response, 'comment 2')
+        self.assertFalse(response.context['comments'].has_next())
+
+    def test_comments_fragment_for_missing_post(self):
+        """Фрагмент комментариев несуществующего поста отдаёт 404."""
+        url = reverse('posts:post_comments', kwargs={'post_id': 0})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class PostCardsCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_group',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='cached text')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_are_cached_until_post_changes(self):
+        """Карточка поста берётся из кеша до изменения поста."""
+        [card] = render_post_cards([self.post])
+        self.assertIn('cached text', card)
+        Post.objects.filter(pk=self.post.pk).update(text='silent change')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(render_post_cards([post]), [card])
+        post.save()
+        [card] = render_post_cards([post])
+        self.assertIn('silent change', card)
+
+    def test_cards_depend_on_group_context_and_group(self):
+        """Карточка учитывает страницу группы и изменения группы."""
+        group_url = reverse('posts:group_list',
+                            kwargs={'slug': self.group.slug})
+        [card] = render_post_cards([self.post])
+        [group_card] = render_post_cards([self.post], in_group=True)
+        self.assertIn(group_url, card)
+        self.assertNotIn(group_url, group_card)
+        self.group.slug = 'renamed'
+        self.group.save()
+        [card] = render_post_cards([Post.objects.get(pk=self.post.pk)])
+        self.assertIn(
+            reverse('posts:group_list', kwargs={'slug': 'renamed'}), card)
+
+    def test_missing_version_is_not_overwritten(self):
+        """Версию, заведённую параллельным bump_version, не затираем."""
+        key = version_key('post', self.post.pk)
+        add = cache.add
+
+        def concurrent_add(name, value, timeout=None):
+            if name == key:
+                add(key, 12345, None)
+            return add(name, value, timeout)
+
+        with mock.patch.object(cache, 'add', side_effect=concurrent_add):
+            [card] = render_post_cards([self.post])
+        self.assertEqual(cache.get(key), 12345)
+        self.assertEqual(render_post_cards([self.post]), [card])
+
+    def test_card_not_stored_if_version_bumped_while_rendering(self):
+        """Карточку, отрисованную до bump_version, не сохраняем."""
+        key = version_key('post', self.post.pk)
+
+        def render_and_bump(*args, **kwargs):
+            bump_version(key)
+            return 'rendered'
+
+        with mock.patch('posts.cards.render_to_string',
+                        side_effect=render_and_bump):
+            render_post_cards([self.post])
+        self.assertIsNone(cache.get(f'post_card:{self.post.pk}:0'))
+
+
+@override_settings(FEED_CACHE_LOCK_WAIT=0.1)
+class FeedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.calls = 0
+
+        @cache_feed(60, key_prefix='test_page')
+        def view(request):
+            self.calls += 1
+            return HttpResponse(f'render {self.calls}')
+
+        self.view = view
+        self.request = RequestFactory().get('/feed/')
+        self.request.user = AnonymousUser()
+        self.lock_key = _lock_key('test_page.anonymous', self.request)
+
+    def get(self):
+        return self.view(self.request).content.decode()
+
+    def test_hit_and_invalidation(self):
+        """Страница берётся из кеша до смены поколения ленты."""
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get(), 'render 1')
+        bump_feed_generation()
+        self.assertEqual(self.get(), 'render 2')
+        counters = registry.snapshot()['counters']
+        self.assertEqual(counters['test_page.hit'], 1)
+        self.assertEqual(counters['test_page.miss'], 2)
+
+    def test_stale_copy_served_while_locked(self):
+        """Пока страницу перестраивают, отдаётся устаревшая копия."""
+        self.get()
+        bump_feed_generation()
+        cache.add(self.lock_key, 1)
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(registry.snapshot()['counters']['test_page.stale'],
+                         1)
+
+    def test_lock_wait_without_copy(self):
+        """Без копии запрос ждёт блокировку, затем строит страницу сам."""
+        cache.add(self.lock_key, 1)
+        self.assertEqual(self.get(), 'render 1')
+        counters = registry.snapshot()['counters']
+        self.assertEqual(counters['test_page.lock_wait'], 1)
+        self.assertEqual(counters['test_page.miss'], 1)
+
+    def test_pages_are_cached_per_user(self):
+        """Кеш страниц не смешивает разных пользователей."""
+        self.get()
+        self.request.user = User.objects.create_user(username='reader')
+        self.assertEqual(self.get(), 'render 2')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='text')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_not_modified(self):
+        """Повторный запрос ленты с ETag получает 304."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        second_page = self.client.get(url, {'page': 2})
+        self.assertNotEqual(second_page['ETag'], etag)
+        Post.objects.create(author=self.user, text='new post')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_stale_feed_keeps_its_etag(self):
+        """Устаревшая копия ленты отдаётся со своим прежним ETag."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.user, text='new post')
+        # Страницу перестраивает другой запрос.
+        lock_key = _lock_key('index_page.anonymous',
+                             RequestFactory().get(url))
+        cache.add(lock_key, 1)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'new post')
+        self.assertEqual(response['ETag'], etag)
+        cache.delete(lock_key)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'new post')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_login_keeps_feed_etag(self):
+        """Вход пользователя не сбрасывает ETag и кеш лент."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        update_last_login(None, self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_post_detail_not_modified(self):
+        """Страница поста отвечает 304 одним запросом и меняет ETag
+        при новом комментарии."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(post=self.post, author=self.user, text='new')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
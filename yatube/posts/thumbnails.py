@@ -0,0 +1,120 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from .cache import bump_feed_generation, bump_version, version_key
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+# Миниатюры, поставленные в очередь текущим запросом потока.
+_request = threading.local()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def _thumbnail_options(source, options):
+    """Дополнить опции так же, как это делает ThumbnailBackend."""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def get_ready_thumbnail(image, alias):
+    """Готовая миниатюра из KV-хранилища sorl или None.
+
+    В отличие от тега ``thumbnail`` никогда не создаёт миниатюру сама.
+    """
+    geometry, options = settings.POST_THUMBNAILS[alias]
+    source = ImageFile(image)
+    options = _thumbnail_options(source, options)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def thumbnails_ready(image_name):
+    return all(get_ready_thumbnail(image_name, alias)
+               for alias in settings.POST_THUMBNAILS)
+
+
+def generate_thumbnails(image_name):
+    """Создать миниатюры всех настроенных размеров для картинки."""
+    try:
+        for geometry, options in settings.POST_THUMBNAILS.values():
+            default.backend.get_thumbnail(image_name, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', image_name)
+        return False
+    post_ids = Post.objects.filter(image=image_name).values_list(
+        'pk', flat=True)
+    for post_id in post_ids:
+        bump_version(version_key('post', post_id))
+    # Страницы лент и их ETag тоже ссылаются на исходную картинку.
+    if post_ids:
+        bump_feed_generation()
+    return True
+
+
+def _generate_in_background(image_name):
+    try:
+        generate_thumbnails(image_name)
+    finally:
+        connection.close()
+
+
+def _submit(image_name):
+    future = get_executor().submit(_generate_in_background, image_name)
+    pending = getattr(_request, 'pending', None)
+    if pending is not None:
+        pending.append(future)
+
+
+def start_request():
+    _request.pending = []
+
+
+def finish_request():
+    """Дождаться миниатюр, поставленных в очередь запросом.
+
+    Вызывается, когда ответ уже отдан клиенту: создание миниатюр
+    не задерживает ответ, но и не переживает запрос, продолжая
+    писать в базу после его завершения.
+    """
+    pending, _request.pending = getattr(_request, 'pending', None), None
+    if pending:
+        wait(pending)
+
+
+def queue_thumbnails(post):
+    """Поставить создание миниатюр поста в фоновую очередь."""
+    if not post.image:
+        return
+    image_name = post.image.name
+    if not settings.THUMBNAIL_ASYNC:
+        generate_thumbnails(image_name)
+        return
+    transaction.on_commit(lambda: _submit(image_name))
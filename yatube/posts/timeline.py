@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Follow, Post, Timeline
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    followers = (Follow.objects.filter(author_id=post.author_id)
+                 .values_list('user_id', flat=True).distinct())
+    Timeline.objects.bulk_create(
+        (Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_many(posts):
+    """Разложить пачку новых постов по лентам одним чтением подписок."""
+    followers = {}
+    pairs = (Follow.objects.filter(author_id__in={p.author_id for p in posts})
+             .values_list('author_id', 'user_id').distinct())
+    for author_id, user_id in pairs:
+        followers.setdefault(author_id, []).append(user_id)
+    Timeline.objects.bulk_create(
+        (Timeline(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+         for post in posts
+         for user_id in followers.get(post.author_id, ())),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту подписчика все посты автора."""
+    posts = (Post.objects.filter(author_id=author_id)
+             .values_list('id', 'pub_date').iterator())
+    Timeline.objects.bulk_create(
+        (Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убрать из ленты подписчика посты автора."""
+    Timeline.objects.filter(user_id=user_id,
+                            post__author_id=author_id).delete()
+
+
+def rebuild(user_id=None):
+    """Пересобрать ленты всех пользователей или одного пользователя.
+
+    Ленты заполняются одним INSERT ... SELECT: построчный backfill
+    по каждой подписке на больших базах работает минутами.
+    """
+    timeline = Timeline.objects.all()
+    sql = (
+        f'INSERT INTO {Timeline._meta.db_table} (user_id, post_id, pub_date) '
+        f'SELECT follow.user_id, post.id, post.pub_date '
+        f'FROM {Follow._meta.db_table} follow '
+        f'INNER JOIN {Post._meta.db_table} post '
+        f'ON post.author_id = follow.author_id'
+    )
+    params = []
+    if user_id is not None:
+        timeline = timeline.filter(user_id=user_id)
+        sql += ' WHERE follow.user_id = %s'
+        params.append(user_id)
+    with transaction.atomic():
+        timeline.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
@@ -1,24 +1,35 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views import View
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 from django.views.generic.edit import FormView
 
+from .cache import cache_feed, feed_etag, post_etag
+from .counters import get_user_counters
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-
-
-def paginator_list(request, post_list):
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
+from .loaders import load_comments, load_post_detail
+from .models import Follow, Group, Post, Timeline, User
+from .paginators import CursorPaginator, TimelinePaginator
+from .search import SearchPaginator
+from .thumbnails import queue_thumbnails
+
+
+def paginator_list(request, post_list, paginator_class=CursorPaginator):
+    paginator = paginator_class(post_list, settings.POSTS_ON_PAGE)
+    after = request.GET.get('after')
+    if after:
+        return paginator.get_cursor_page(after)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(20, key_prefix='index_page')
+@condition(etag_func=feed_etag)
+@cache_feed(settings.FEED_CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
     post_list = Post.objects.select_related('author', 'group')
     page_obj = paginator_list(request, post_list)
@@ -29,6 +40,8 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=feed_etag)
+@cache_feed(settings.FEED_CACHE_TIMEOUT, key_prefix='group_page')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
@@ -42,6 +55,8 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=feed_etag)
+@cache_feed(settings.FEED_CACHE_TIMEOUT, key_prefix='profile_page')
 def profile(request, username):
     user = get_object_or_404(User, username=username)
     post_list = user.posts.select_related('group')
@@ -51,28 +66,55 @@ def profile(request, username):
     context = {
         'title': title,
         'author': user,
-        'posts': post_list,
+        'counters': get_user_counters(user),
         'page_obj': page_obj,
         'following': following
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    title = f'Пост {post.text[:30]}'
-    posts = Post.objects.filter(author=post.author)
-    comments = Comment.objects.filter(post=post)
-    context = {
-        'title': title,
-        'post': post,
-        'posts': posts,
-        'comments': comments,
+    context = load_post_detail(post_id, request.GET.get('comments_after'))
+    context.update({
+        'title': f'Пост {context["post"].text[:30]}',
         'form': CommentForm(),
-    }
+    })
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(query, settings.POSTS_ON_PAGE)
+    page_obj = paginator.get_cursor_page(request.GET.get('after'))
+    context = {
+        'title': 'Поиск по записям',
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = load_comments(post_id, request.GET.get('after'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        }, json_dumps_params={'ensure_ascii': False})
+    return render(request, 'posts/includes/comments.html',
+                  {'post': post, 'comments': comments})
+
+
 class PostCreate(LoginRequiredMixin, View):
 
     def get(self, request):
@@ -85,7 +127,10 @@ class PostCreate(LoginRequiredMixin, View):
         if form.is_valid():
             form_save = form.save(commit=False)
             form_save.author_id = request.user.id
-            form.save()
+            # Счётчики и лента обновляются сигналами в той же транзакции.
+            with transaction.atomic():
+                post = form.save()
+                queue_thumbnails(post)
             return redirect(reverse('posts:profile',
                                     args=[request.user.username]))
         return render(request, 'posts/create_post.html',
@@ -100,7 +145,10 @@ class PostEdit(FormView):
         return int(self.request.get_full_path().split('/')[2])
 
     def form_valid(self, form):
-        form.save()
+        with transaction.atomic():
+            post = form.save()
+            if 'image' in form.changed_data:
+                queue_thumbnails(post)
         return super().form_valid(form)
 
     def get_form(self, form_class=None):
@@ -145,14 +193,16 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator_list(request, post_list)
+    entries = Timeline.objects.filter(user=request.user).select_related(
+        'post__author', 'post__group')
+    page_obj = paginator_list(request, entries, TimelinePaginator)
     context = {'page_obj': page_obj,
                'title': 'title'}
     return render(request, 'posts/follow.html', context)
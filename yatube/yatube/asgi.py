@@ -0,0 +1,14 @@
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+from core.templates import preload_templates
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# Страницы под адаптером не быстрее WSGI (manage.py bench_asgi): он нужен
+# для запуска под ASGI-сервером, где медленные клиенты не держат поток.
+application = WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+preload_templates()
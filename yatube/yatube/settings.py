@@ -23,11 +23,14 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ViewMetricsMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,13 +46,24 @@ INTERNAL_IPS = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Без DEBUG шаблоны компилируются один раз на процесс: кешируемый
+# загрузчик держит их в памяти, а yatube.wsgi и yatube.asgi
+# компилируют все шаблоны при старте (core.templates).
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders),
+    ]
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': template_loaders,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -61,14 +75,42 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+TEST_RUNNER = 'core.runner.TestRunner'
+# Потоков, в которых yatube.asgi выполняет запросы.
+ASGI_THREADS = 16
 
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, '../db.sqlite3'),
-    }
+        'OPTIONS': {'pool': {'max_size': 10, 'idle_timeout': 300}},
+    },
 }
+# Чтения идут через соединения только для чтения: к той же базе или
+# к репликам из YATUBE_READ_REPLICAS (пути через запятую; локально
+# их обновляет manage.py replicate_sqlite). В тестах псевдонимы —
+# зеркала тестовой базы default.
+replica_paths = [
+    path for path in os.getenv('YATUBE_READ_REPLICAS', '').split(',')
+    if path
+] or [DATABASES['default']['NAME']]
+READ_DATABASES = []
+for number, path in enumerate(replica_paths, start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'read_only': True,
+            'pool': DATABASES['default']['OPTIONS']['pool'],
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.db.routers.ReadWriteRouter']
+READ_REPLICA_APPS = ('posts', 'auth')
+PRIMARY_PIN_COOKIE = 'pin_primary'
+PRIMARY_PIN_SECONDS = 5
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -89,10 +131,25 @@ AUTH_PASSWORD_VALIDATORS = [
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION',
+                              os.path.join(BASE_DIR, '../cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 64 * 1024 * 1024,
+        },
     }
 }
 
+FEED_CACHE_TIMEOUT = 60 * 60 * 3
+# Сколько ещё отдавать устаревшую ленту, пока её перестраивают.
+FEED_CACHE_STALE_TIMEOUT = 60 * 10
+FEED_CACHE_LOCK_TIMEOUT = 30
+FEED_CACHE_LOCK_WAIT = 2
+FEED_CACHE_BETA = 1.0
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 LANGUAGE_CODE = 'ru'
@@ -112,6 +169,23 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 POSTS_ON_PAGE = 10
 
+COMMENTS_ON_PAGE = 20
+
+API_PAGE_SIZE_MAX = 100
+
+EXPORT_CHUNK_SIZE = 2000
+
+TIMELINE_BATCH_SIZE = 500
+
+VIEW_QUERY_BUDGET_DEFAULT = 10
+VIEW_QUERY_BUDGETS = {
+    'posts:index': 8,
+    'posts:group_list': 6,
+    'posts:profile': 8,
+    'posts:post_detail': 8,
+    'posts:follow_index': 6,
+}
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -124,6 +198,12 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
 if DEBUG:
     INSTALLED_APPS.append('debug_toolbar')
     MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
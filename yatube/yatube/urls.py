@@ -3,10 +3,14 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import view_metrics
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
+    path('metrics/', view_metrics, name='view_metrics'),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
 ]